@@ -0,0 +1,247 @@
+import hashlib
+import os
+import re
+import secrets
+import tempfile
+import time
+from collections import Counter
+
+from flask import current_app, jsonify
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+DIGEST_RE = re.compile(r'[0-9a-f]{64}')
+UPLOAD_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+
+class ArtifactError(Exception):
+    pass
+
+
+class ArtifactStore:
+    """Stockage des fichiers de challenge adressé par contenu.
+
+    Chaque fichier est écrit une seule fois sous
+    UPLOAD_FOLDER/blobs/<2 premiers caractères>/<sha256>, l'empreinte étant
+    calculée pendant la copie par blocs. Deux challenges avec le même
+    contenu partagent le blob. Le nombre de challenges qui pointent vers
+    un fichier est tenu dans la table artifact_refs, modifiée par
+    `acquire` et `release` dans la transaction du challenge ; `collect`
+    supprime ensuite, sous le verrou de la ligne, les fichiers dont le
+    compteur est retombé à zéro.
+
+    Les gros fichiers passent par des sessions d'envoi reprenables :
+    le client envoie des morceaux successifs (PUT + Content-Range) qui
+    sont ajoutés à UPLOAD_FOLDER/tmp/<id>.part, puis termine la session,
+    ce qui calcule l'empreinte et déplace le fichier dans les blobs.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('UPLOAD_FOLDER', 'uploads')
+        app.config.setdefault('ARTIFACT_CHUNK_SIZE', 1024 * 1024)
+        app.config.setdefault('ARTIFACT_MAX_SIZE', 8 * 1024 ** 3)
+        app.config.setdefault('ARTIFACT_UPLOAD_TTL', 24 * 3600)
+        app.extensions['artifacts'] = self
+        app.register_error_handler(ArtifactError, self._invalid)
+
+    @staticmethod
+    def _invalid(error):
+        return jsonify({'error': str(error)}), 400
+
+    def _root(self, *parts):
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], *parts)
+
+    def blob_path(self, digest):
+        return self._root('blobs', digest[:2], digest)
+
+    def _tmp_dir(self):
+        path = self._root('tmp')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def digest_of(path):
+        """Empreinte déduite du chemin d'un blob, None pour un autre fichier."""
+        name = os.path.basename(path or '')
+        if DIGEST_RE.fullmatch(name) and os.path.basename(os.path.dirname(os.path.dirname(path))) == 'blobs':
+            return name
+        return None
+
+    def _commit(self, tmp_path, digest):
+        # Écriture atomique : un blob visible est toujours complet
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return path
+
+    def _copy(self, stream, target, sha, limit):
+        chunk_size = current_app.config['ARTIFACT_CHUNK_SIZE']
+        written = 0
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            written += len(chunk)
+            if written > limit:
+                raise ArtifactError('File too large')
+            if sha is not None:
+                sha.update(chunk)
+            target.write(chunk)
+        return written
+
+    def store(self, stream):
+        """Copie un flux dans le stockage ; renvoie (chemin, empreinte, taille)."""
+        sha = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir(), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as target:
+                size = self._copy(stream, target, sha, current_app.config['ARTIFACT_MAX_SIZE'])
+            digest = sha.hexdigest()
+            return self._commit(tmp_path, digest), digest, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def exists(self, digest):
+        return bool(DIGEST_RE.fullmatch(digest or '')) and os.path.exists(self.blob_path(digest))
+
+    def _count(self, path, delta):
+        """Ajoute `delta` au compteur de `path` et verrouille sa ligne.
+
+        Le verrou (ligne sous PostgreSQL, base sous SQLite) est tenu
+        jusqu'à la fin de la transaction en cours.
+        """
+        from .models import db, ArtifactRef
+        from .scoring import _ignore_conflicts
+
+        refs = ArtifactRef.__table__
+        dialect = db.engine.dialect.name
+        while True:
+            stmt = _ignore_conflicts(dialect, refs, ['path']).values(path=path, refcount=0)
+            if dialect in ('postgresql', 'sqlite'):
+                db.session.execute(stmt)
+            else:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(stmt)
+                except IntegrityError:
+                    pass
+            count = refs.c.refcount + delta
+            if db.session.execute(
+                update(refs).where(refs.c.path == path).values(refcount=db.case((count < 0, 0), else_=count))
+            ).rowcount:
+                return
+            # Ligne supprimée par `collect` entre les deux requêtes
+
+    def acquire(self, paths):
+        """Compte une référence par chemin dans la transaction en cours.
+
+        Le fichier est vérifié après le verrouillage du compteur : s'il a
+        été supprimé par `collect` entre-temps, ArtifactError est levée et
+        l'appelant annule sa transaction.
+        """
+        for path, count in Counter(path for path in paths if path).items():
+            self._count(path, count)
+            if not os.path.exists(path):
+                raise ArtifactError('Unknown artifact')
+
+    def release(self, paths):
+        """Retire une référence par chemin dans la transaction en cours.
+
+        Le fichier n'est pas supprimé : appeler `collect` après la validation.
+        """
+        for path, count in Counter(path for path in paths if path).items():
+            self._count(path, -count)
+
+    def collect(self, paths):
+        """Supprime les fichiers qui ne sont plus référencés ; renvoie leur nombre.
+
+        À appeler après la validation qui a retiré les références, ou après
+        l'annulation d'une transaction qui avait copié des fichiers. Chaque
+        compteur est relu sous verrou : une référence ajoutée en même temps
+        attend la fin de la suppression puis constate l'absence du fichier.
+        """
+        from .models import db, ArtifactRef
+
+        refs = ArtifactRef.__table__
+        root = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+        removed = 0
+        for path in {path for path in paths if path}:
+            if os.path.commonpath([root, os.path.abspath(path)]) != root:
+                continue
+            try:
+                self._count(path, 0)
+                if not db.session.execute(select(refs.c.refcount).where(refs.c.path == path)).scalar():
+                    if os.path.exists(path):
+                        os.remove(path)
+                        removed += 1
+                    db.session.execute(refs.delete().where(refs.c.path == path))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return removed
+
+    # Sessions d'envoi reprenables
+
+    def _part(self, upload_id):
+        if not UPLOAD_ID_RE.fullmatch(upload_id or ''):
+            return None
+        return os.path.join(self._tmp_dir(), f'{upload_id}.part')
+
+    def _purge_stale(self):
+        deadline = time.time() - current_app.config['ARTIFACT_UPLOAD_TTL']
+        with os.scandir(self._tmp_dir()) as entries:
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime < deadline:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def open_session(self):
+        self._purge_stale()
+        upload_id = secrets.token_hex(16)
+        open(self._part(upload_id), 'xb').close()
+        return upload_id
+
+    def offset(self, upload_id):
+        """Nombre d'octets reçus, None si la session n'existe pas."""
+        path = self._part(upload_id)
+        if path is None or not os.path.exists(path):
+            return None
+        return os.path.getsize(path)
+
+    def append(self, upload_id, stream, start):
+        """Ajoute un morceau à partir de `start`, qui doit être l'offset courant."""
+        path = self._part(upload_id)
+        if path is None or not os.path.exists(path):
+            raise ArtifactError('Upload not found')
+        with open(path, 'ab') as target:
+            offset = target.tell()
+            if start != offset:
+                raise ArtifactError(f'Expected offset {offset}')
+            self._copy(stream, target, None, current_app.config['ARTIFACT_MAX_SIZE'] - offset)
+            return target.tell()
+
+    def complete(self, upload_id):
+        path = self._part(upload_id)
+        if path is None or not os.path.exists(path):
+            raise ArtifactError('Upload not found')
+        sha = hashlib.sha256()
+        chunk_size = current_app.config['ARTIFACT_CHUNK_SIZE']
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(chunk_size), b''):
+                sha.update(chunk)
+        size = os.path.getsize(path)
+        digest = sha.hexdigest()
+        return self._commit(path, digest), digest, size
+
+    def abort(self, upload_id):
+        path = self._part(upload_id)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+
+artifacts = ArtifactStore()
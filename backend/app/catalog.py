@@ -0,0 +1,80 @@
+import hashlib
+import threading
+
+from .state import shared_state
+
+CATALOG_KEY = 'catalog'
+
+
+class CatalogCache:
+    """Catalogue des challenges actifs, mis en cache par version.
+
+    Toute modification faite par un administrateur appelle `bump` (une
+    fois par requête), qui incrémente la version partagée. Le worker qui
+    incrémente la voit aussitôt ; les autres la relisent au plus tard
+    après SHARED_STATE_TTL secondes et peuvent, d'ici là, servir l'ancien
+    catalogue et son ETag.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = {}
+
+    def version(self):
+        version = shared_state.version(CATALOG_KEY)
+        if version != self._version:
+            with self._lock:
+                self._entries = {}
+                self._version = version
+        return version
+
+    def _cached(self, key, load):
+        entries = self._entries
+        if key not in entries:
+            value = load()
+            with self._lock:
+                entries[key] = value
+        return entries[key]
+
+    def challenges(self, category=None, difficulty=None):
+        from .models import Challenge
+
+        def load():
+            query = Challenge.query.filter_by(is_active=True)
+            if category:
+                query = query.filter_by(category=category)
+            if difficulty:
+                query = query.filter_by(difficulty=difficulty)
+            return tuple({
+                'id': c.id,
+                'title': c.title,
+                'description': c.description,
+                'category': c.category,
+                'difficulty': c.difficulty,
+                'points': c.points,
+                'scoring': c.scoring,
+                'created_at': c.created_at.isoformat()
+            } for c in query.order_by(Challenge.id))
+
+        return self._cached(('challenges', category, difficulty), load)
+
+    def distinct(self, column_name):
+        from .models import db, Challenge
+
+        def load():
+            column = getattr(Challenge, column_name)
+            return tuple(value for (value,) in db.session.query(column).distinct().order_by(column))
+
+        return self._cached(('distinct', column_name), load)
+
+    def bump(self):
+        shared_state.bump(CATALOG_KEY)
+
+    @staticmethod
+    def etag(version, *parts):
+        raw = ':'.join(str(part) for part in (version,) + parts)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+
+catalog = CatalogCache()
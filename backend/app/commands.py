@@ -0,0 +1,61 @@
+import os
+
+import click
+from flask.cli import with_appcontext
+
+from .scoring import reconcile_team_scores
+from .seed import bootstrap
+from .packs import import_pack, export_pack, PackError
+
+
+@click.command('reconcile-team-scores')
+@with_appcontext
+def reconcile_team_scores_command():
+    """Recalcule tous les scores d'équipe depuis solved_challenges."""
+    count = reconcile_team_scores()
+    click.echo(f'{count} équipe(s) recalculée(s).')
+
+
+@click.command('bootstrap')
+@click.option('--replace-challenges', is_flag=True, help='Remplace les challenges existants par ceux par défaut.')
+@with_appcontext
+def bootstrap_command(replace_challenges):
+    """Applique les migrations et crée les données initiales (à chaque déploiement)."""
+    created_admin, created_challenges = bootstrap(replace_challenges)
+    if created_admin:
+        click.echo('Utilisateur administrateur créé.')
+    click.echo(f'{created_challenges} challenge(s) ajouté(s).')
+
+
+@click.command('import-challenges')
+@click.argument('manifest', type=click.File('rb'))
+@click.option('--artifacts', 'artifacts_dir', type=click.Path(exists=True, file_okay=False),
+              help='Dossier des fichiers référencés par le pack (champ file ou empreinte).')
+@with_appcontext
+def import_challenges_command(manifest, artifacts_dir):
+    """Importe un pack de challenges (JSON ou NDJSON), mis à jour par titre."""
+    try:
+        created, updated = import_pack(manifest, artifacts_dir)
+    except PackError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'{created} challenge(s) créé(s), {updated} mis à jour.')
+
+
+@click.command('export-challenges')
+@click.argument('manifest', type=click.File('w', encoding='utf-8'))
+@click.option('--artifacts', 'artifacts_dir', type=click.Path(file_okay=False),
+              help='Copie les fichiers des challenges dans ce dossier, sous leur empreinte.')
+@with_appcontext
+def export_challenges_command(manifest, artifacts_dir):
+    """Exporte tous les challenges en NDJSON."""
+    if artifacts_dir:
+        os.makedirs(artifacts_dir, exist_ok=True)
+    for line in export_pack(artifacts_dir):
+        manifest.write(line)
+
+
+def init_app(app):
+    app.cli.add_command(bootstrap_command)
+    app.cli.add_command(import_challenges_command)
+    app.cli.add_command(export_challenges_command)
+    app.cli.add_command(reconcile_team_scores_command)
@@ -0,0 +1,134 @@
+import json
+import os
+import queue
+import secrets
+import threading
+from collections import deque
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+
+class Subscription:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class EventBroker:
+    """Diffuseur d'évènements en mémoire pour le flux SSE.
+
+    Chaque connexion possède une file bornée : un client trop lent pour la
+    vider est déconnecté (il se reconnecte et rattrape son retard via
+    Last-Event-ID) au lieu de faire grossir la mémoire du worker.
+
+    Les évènements ne sont diffusés qu'aux clients connectés au worker qui
+    les publie. Leurs identifiants (`<nonce>-<numéro>`) sont propres au
+    processus : un client qui se reconnecte sur un autre worker, ou dont
+    le retard dépasse l'historique, reçoit un évènement `resync` et
+    recharge l'état complet.
+
+    EventSource ne permet pas d'en-tête Authorization : le flux s'ouvre avec
+    un ticket signé de courte durée (EVENTS_TICKET_MAX_AGE secondes) obtenu
+    avec le token d'accès, pour que celui-ci n'apparaisse jamais dans une
+    URL ni dans les journaux d'accès.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=256)
+        self._last_id = 0
+        self._pid = None
+        self._nonce = None
+
+    def init_app(self, app):
+        app.config.setdefault('EVENTS_HEARTBEAT', 15)
+        app.config.setdefault('EVENTS_QUEUE_SIZE', 64)
+        app.config.setdefault('EVENTS_MAX_DURATION', 300)
+        app.config.setdefault('EVENTS_TICKET_MAX_AGE', 60)
+        # Désactivé sous des workers sync (voir gunicorn.conf.py) : chaque
+        # flux y bloquerait un worker entier
+        app.config.setdefault('EVENTS_STREAM_ENABLED', True)
+        app.extensions['events'] = self
+
+    @staticmethod
+    def _serializer():
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='events-stream')
+
+    def issue_ticket(self, identity):
+        return self._serializer().dumps(str(identity))
+
+    def read_ticket(self, ticket):
+        """Identité du ticket, ou None s'il est invalide ou expiré."""
+        try:
+            return self._serializer().loads(ticket, max_age=current_app.config['EVENTS_TICKET_MAX_AGE'])
+        except BadSignature:
+            return None
+
+    @property
+    def nonce(self):
+        # Recalculé après un fork : chaque worker a sa propre séquence
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._nonce = secrets.token_hex(4)
+        return self._nonce
+
+    def _missed(self, last_event_id, maxsize):
+        nonce, _, number = last_event_id.rpartition('-')
+        if nonce == self.nonce and number.isdigit():
+            number = int(number)
+            oldest = self._history[0][0] if self._history else self._last_id + 1
+            if oldest - 1 <= number <= self._last_id:
+                missed = [event for event in self._history if event[0] > number]
+                if len(missed) <= maxsize:
+                    return missed
+        # Autre worker, redémarrage ou retard trop grand : état complet à
+        # recharger, avec un identifiant de cette séquence
+        return [(self._last_id, 'resync', '{}')]
+
+    def subscribe(self, maxsize, last_event_id=None):
+        subscription = Subscription(maxsize)
+        with self._lock:
+            if last_event_id:
+                for event in self._missed(last_event_id, maxsize):
+                    subscription.queue.put_nowait(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, data):
+        with self._lock:
+            self._last_id += 1
+            event = (self._last_id, event_type, json.dumps(data, separators=(',', ':')))
+            self._history.append(event)
+            for subscription in list(self._subscribers):
+                try:
+                    subscription.queue.put_nowait(event)
+                except queue.Full:
+                    self._drop(subscription)
+
+    def _drop(self, subscription):
+        # File pleine : on vide la file et on y dépose un marqueur qui
+        # termine le flux côté client.
+        self._subscribers.discard(subscription)
+        subscription.overflowed = True
+        while True:
+            try:
+                subscription.queue.get_nowait()
+            except queue.Empty:
+                break
+        subscription.queue.put_nowait(None)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def format(self, event):
+        event_id, event_type, data = event
+        return f"id: {self.nonce}-{event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+events = EventBroker()
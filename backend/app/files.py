@@ -0,0 +1,102 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+
+from flask import current_app, request, send_file
+
+from .artifacts import ArtifactStore
+
+FILE_OFFLOAD_MODES = ('x-accel', 'x-sendfile')
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class FileServer:
+    """Envoi des fichiers de challenge.
+
+    L'ETag est un SHA-256 du contenu, mis en cache par (chemin, mtime,
+    taille) : il ne change que si le fichier change et reste identique
+    d'un worker à l'autre, ce qui permet de reprendre un téléchargement
+    (Range + If-Range) ou de répondre 304.
+
+    FILE_OFFLOAD = 'x-accel' (nginx) ou 'x-sendfile' (Apache, lighttpd)
+    confie le transfert au proxy : Python ne fait plus que la vérification
+    d'accès et renvoie une réponse vide avec l'en-tête correspondant.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._digests = OrderedDict()
+
+    def init_app(self, app):
+        app.config.setdefault('UPLOAD_FOLDER', 'uploads')
+        app.config.setdefault('FILE_OFFLOAD', None)
+        app.config.setdefault('FILE_OFFLOAD_PREFIX', '/protected-uploads/')
+        app.config.setdefault('FILE_DIGEST_CACHE_SIZE', 1024)
+        app.config.setdefault('FILE_MAX_AGE', 0)
+        if app.config['FILE_OFFLOAD'] not in (None,) + FILE_OFFLOAD_MODES:
+            raise ValueError(f"Unknown FILE_OFFLOAD mode: {app.config['FILE_OFFLOAD']}")
+        app.extensions['file_server'] = self
+
+    def digest(self, path):
+        # Les blobs du stockage d'artefacts portent déjà leur empreinte
+        digest = ArtifactStore.digest_of(path)
+        if digest is not None:
+            return digest
+
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(key)
+            if digest is not None:
+                self._digests.move_to_end(key)
+                return digest
+
+        sha = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self._lock:
+            self._digests[key] = digest
+            while len(self._digests) > current_app.config['FILE_DIGEST_CACHE_SIZE']:
+                self._digests.popitem(last=False)
+        return digest
+
+    def send(self, path, download_name):
+        config = current_app.config
+        etag = self.digest(path)
+        mode = config['FILE_OFFLOAD']
+        if mode is None:
+            # Werkzeug gère Range, If-Range et If-None-Match à partir de l'ETag
+            response = send_file(path, as_attachment=True, download_name=download_name,
+                                 etag=etag, max_age=config['FILE_MAX_AGE'])
+            response.accept_ranges = 'bytes'
+            return response
+
+        response = current_app.response_class(status=200)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+        response.mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+        # Le 304 est rendu ici, sans solliciter le proxy ; les plages sont
+        # traitées par le proxy lui-même
+        if request.if_none_match.contains(etag):
+            response.status_code = 304
+            return response
+
+        if mode == 'x-accel':
+            relative = os.path.relpath(os.path.abspath(path), os.path.abspath(config['UPLOAD_FOLDER']))
+            if relative.startswith(os.pardir):
+                raise ValueError(f'{path} is outside UPLOAD_FOLDER')
+            response.headers['X-Accel-Redirect'] = config['FILE_OFFLOAD_PREFIX'].rstrip('/') + '/' + quote(relative.replace(os.sep, '/'))
+        else:
+            response.headers['X-Sendfile'] = os.path.abspath(path)
+        return response
+
+
+file_server = FileServer()
@@ -0,0 +1,112 @@
+import hmac
+import re
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+FLAG_MODES = ('exact', 'case_insensitive', 'regex')
+
+CachedChallenge = namedtuple('CachedChallenge', ['id', 'points', 'scoring', 'is_active', 'matcher', 'loaded_at'])
+
+
+class FlagMatcher:
+    """Vérifie un flag soumis contre un ou plusieurs flags acceptés.
+
+    Le champ `flag` d'un challenge peut contenir plusieurs flags, un par
+    ligne. Les comparaisons exactes se font en temps constant et sans
+    s'arrêter au premier flag trouvé ; en mode regex chaque ligne est une
+    expression qui doit couvrir tout le flag soumis.
+    """
+
+    def __init__(self, flag, mode='exact'):
+        if mode not in FLAG_MODES:
+            raise ValueError(f'Unknown flag mode: {mode}')
+        self.mode = mode
+        flags = [line.strip() for line in (flag or '').splitlines() if line.strip()]
+        if mode == 'regex':
+            self._patterns = [re.compile(pattern) for pattern in flags]
+        else:
+            self._flags = [self._normalize(value) for value in flags]
+
+    def _normalize(self, value):
+        if self.mode == 'case_insensitive':
+            value = value.casefold()
+        return value.encode('utf-8')
+
+    def matches(self, submitted):
+        if not isinstance(submitted, str):
+            return False
+        if self.mode == 'regex':
+            return any(pattern.fullmatch(submitted) for pattern in self._patterns)
+        candidate = self._normalize(submitted)
+        matched = False
+        for expected in self._flags:
+            matched |= hmac.compare_digest(candidate, expected)
+        return matched
+
+
+def validate_flag(flag, flag_mode):
+    """Message d'erreur si le flag ou son mode est invalide, sinon None."""
+    if flag_mode not in FLAG_MODES:
+        return f"Invalid flag mode, expected one of: {', '.join(FLAG_MODES)}"
+    try:
+        FlagMatcher(flag, flag_mode)
+    except re.error as e:
+        return f'Invalid flag pattern: {e}'
+    return None
+
+
+class FlagCache:
+    """Cache des matchers compilés, indexé par identifiant de challenge.
+
+    Les routes d'administration invalident l'entrée modifiée ; FLAG_CACHE_TTL
+    borne la durée pendant laquelle un autre worker peut servir une
+    version périmée.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def init_app(self, app):
+        app.config.setdefault('FLAG_CACHE_TTL', 60)
+        app.extensions['flag_cache'] = self
+
+    def get(self, challenge_id):
+        entry = self._entries.get(challenge_id)
+        ttl = current_app.config.get('FLAG_CACHE_TTL', 60)
+        if entry is not None and time.monotonic() - entry.loaded_at <= ttl:
+            return entry
+
+        from .models import db, Challenge
+
+        row = db.session.query(
+            Challenge.id, Challenge.points, Challenge.scoring, Challenge.is_active, Challenge.flag, Challenge.flag_mode
+        ).filter_by(id=challenge_id).first()
+        if row is None:
+            self.invalidate(challenge_id)
+            return None
+
+        entry = CachedChallenge(
+            id=row.id,
+            points=row.points,
+            scoring=row.scoring or 'static',
+            is_active=row.is_active,
+            matcher=FlagMatcher(row.flag, row.flag_mode or 'exact'),
+            loaded_at=time.monotonic()
+        )
+        with self._lock:
+            self._entries[challenge_id] = entry
+        return entry
+
+    def invalidate(self, challenge_id=None):
+        with self._lock:
+            if challenge_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(challenge_id, None)
+
+
+flag_cache = FlagCache()
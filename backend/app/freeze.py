@@ -0,0 +1,108 @@
+import json
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from .events import events
+from .leaderboard import leaderboard, LeaderboardIndex
+from .state import shared_state
+
+# La clé partagée ne porte que la date du gel : sa version est relue
+# régulièrement par chaque worker, l'instantané seulement quand elle change
+FREEZE_KEY = 'scoreboard_freeze'
+SNAPSHOT_KEY = 'scoreboard_snapshot'
+
+# Évènements SSE qui révèlent un score, retenus pendant le gel
+SCORE_EVENTS = frozenset({'solve', 'score', 'team_score'})
+
+FrozenScoreboard = namedtuple('FrozenScoreboard', ['frozen_at', 'users', 'teams', 'team_scores'])
+
+
+class ScoreboardFreeze:
+    """Gel du classement public en fin d'évènement.
+
+    `freeze` enregistre un instantané des classements utilisateurs et
+    équipes. Les résolutions continuent d'être comptées, mais les
+    classements publics servent l'instantané : chaque worker le charge
+    une fois, quand la version de la clé partagée change, puis le garde
+    en mémoire. `unfreeze` efface l'instantané et reconstruit le
+    classement en une fois.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._frozen = None
+
+    def init_app(self, app):
+        app.extensions['scoreboard_freeze'] = self
+
+    def current(self):
+        """Instantané en cours (FrozenScoreboard), ou None hors gel."""
+        state = shared_state.get(FREEZE_KEY)
+        if state.version != self._version:
+            with self._lock:
+                if state.version != self._version:
+                    was_frozen = self._frozen is not None
+                    self._frozen = self._load() if state.value else None
+                    self._version = state.version
+                    if was_frozen and self._frozen is None:
+                        # Dégel vu par ce worker : reconstruction au prochain accès
+                        leaderboard.invalidate()
+        return self._frozen
+
+    @staticmethod
+    def _load():
+        from .models import db, Setting
+
+        value = db.session.query(Setting.value).filter_by(key=SNAPSHOT_KEY).scalar()
+        if not value:
+            return None
+        snapshot = json.loads(value)
+        return FrozenScoreboard(
+            datetime.fromisoformat(snapshot['frozen_at']),
+            LeaderboardIndex.frozen(snapshot['users']),
+            tuple(snapshot['teams']),
+            {team['id']: team['score'] for team in snapshot['teams']}
+        )
+
+    def freeze(self):
+        from .scoring import team_ranking
+
+        leaderboard.rebuild()
+        frozen_at = datetime.utcnow()
+        snapshot = {
+            'frozen_at': frozen_at.isoformat(),
+            'users': leaderboard.snapshot(),
+            'teams': team_ranking()
+        }
+        shared_state.set(SNAPSHOT_KEY, json.dumps(snapshot, separators=(',', ':')))
+        shared_state.set(FREEZE_KEY, frozen_at.isoformat())
+        events.publish('scoreboard', {'frozen': True, 'frozen_at': frozen_at.isoformat()})
+        return frozen_at
+
+    def unfreeze(self):
+        shared_state.set(FREEZE_KEY, None)
+        shared_state.set(SNAPSHOT_KEY, None)
+        self.current()
+        leaderboard.rebuild()
+        events.publish('scoreboard', {'frozen': False})
+
+    def team_score(self, team_id, score, frozen=None):
+        """Score public d'une équipe : celui de l'instantané pendant un gel.
+
+        Une équipe créée après le gel y apparaît avec 0 point.
+        """
+        frozen = frozen or self.current()
+        if frozen is None:
+            return score
+        return frozen.team_scores.get(team_id, 0)
+
+    def publish(self, event_type, data):
+        """Comme events.publish, sauf pour les évènements de score pendant le gel."""
+        if event_type in SCORE_EVENTS and self.current() is not None:
+            return
+        events.publish(event_type, data)
+
+
+scoreboard_freeze = ScoreboardFreeze()
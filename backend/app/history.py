@@ -0,0 +1,114 @@
+import calendar
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from .submission_log import BatchWriter
+
+SUBJECT_TYPES = ('user', 'team')
+
+
+class ScoreHistory(BatchWriter):
+    """Historique des scores cumulés, pour les graphes du classement.
+
+    Chaque changement de score (flag validé, recalcul d'un challenge
+    dynamique, arrivée dans une équipe) ajoute un point (type, id, score,
+    date) à la table score_checkpoints, écrite par lots en arrière-plan.
+    `series` relit les points des sujets demandés en une requête, réduits
+    à au plus un point par intervalle.
+    """
+
+    config_prefix = 'SCORE_HISTORY'
+    model_name = 'ScoreCheckpoint'
+    batch_size = 500
+    flush_interval = 1.0
+    max_buffer = 100000
+
+    def init_app(self, app):
+        super().init_app(app)
+        app.config.setdefault('SCORE_HISTORY_MAX_POINTS', 200)
+        app.config.setdefault('SCORE_HISTORY_MAX_HOURS', 24 * 14)
+
+    def window(self, args):
+        """(début, fin, nombre de points) lus dans les paramètres de requête.
+
+        `hours` : durée de la fenêtre jusqu'à maintenant ; `points` :
+        nombre maximal de points par série.
+        """
+        config = current_app.config
+        hours = args.get('hours', default=24, type=float)
+        points = args.get('points', default=100, type=int)
+        if hours is None or not 0 < hours <= config['SCORE_HISTORY_MAX_HOURS']:
+            raise ValueError(f"hours must be between 0 and {config['SCORE_HISTORY_MAX_HOURS']}")
+        if points is None or points < 1:
+            raise ValueError('points must be a positive integer')
+        end = datetime.utcnow()
+        return end - timedelta(hours=hours), end, min(points, config['SCORE_HISTORY_MAX_POINTS'])
+
+    @staticmethod
+    def points(series):
+        return [[recorded_at.isoformat(), score] for recorded_at, score in series]
+
+    def record(self, subject_type, subject_id, score, recorded_at=None):
+        self._append({
+            'subject_type': subject_type,
+            'subject_id': subject_id,
+            'score': score or 0,
+            'recorded_at': recorded_at or datetime.utcnow()
+        })
+
+    @staticmethod
+    def _bucket(column, start, step):
+        from .models import db
+
+        start_epoch = calendar.timegm(start.utctimetuple())
+        if db.engine.dialect.name == 'postgresql':
+            # EXTRACT renvoie un numeric : arrondi explicite
+            return db.func.floor((db.func.extract('epoch', column) - start_epoch) / step)
+        seconds = db.cast(db.func.strftime('%s', column), db.Integer)
+        return (seconds - start_epoch) // step
+
+    def series(self, subject_type, subject_ids, start, end, points):
+        """Points {id: [(date, score), ...]} entre `start` et `end`.
+
+        L'intervalle est découpé en `points` tranches ; seul le dernier
+        point de chaque tranche est gardé. Le dernier point antérieur à
+        `start` donne la valeur de départ de chaque série.
+        """
+        from .models import db, ScoreCheckpoint
+
+        if not subject_ids:
+            return {}
+        step = max(int((end - start).total_seconds() // points), 1)
+        column = ScoreCheckpoint.recorded_at
+        bucketed = db.select(
+            ScoreCheckpoint.id,
+            ScoreCheckpoint.subject_id,
+            ScoreCheckpoint.score,
+            column,
+            db.case((column < start, -1), else_=self._bucket(column, start, step)).label('bucket')
+        ).where(
+            ScoreCheckpoint.subject_type == subject_type,
+            ScoreCheckpoint.subject_id.in_(subject_ids),
+            column <= end
+        ).subquery()
+        ranked = db.select(
+            bucketed,
+            db.func.row_number().over(
+                partition_by=(bucketed.c.subject_id, bucketed.c.bucket),
+                order_by=(bucketed.c.recorded_at.desc(), bucketed.c.id.desc())
+            ).label('position')
+        ).subquery()
+        rows = db.session.execute(
+            db.select(ranked.c.subject_id, ranked.c.bucket, ranked.c.score, ranked.c.recorded_at)
+            .where(ranked.c.position == 1)
+            .order_by(ranked.c.subject_id, ranked.c.recorded_at)
+        ).all()
+
+        series = {subject_id: [] for subject_id in subject_ids}
+        for subject_id, bucket, score, recorded_at in rows:
+            series[subject_id].append((start if bucket == -1 else recorded_at, score))
+        return series
+
+
+score_history = ScoreHistory()
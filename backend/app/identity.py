@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+Identity = namedtuple('Identity', ['id', 'username', 'email', 'is_admin', 'created_at', 'loaded_at'])
+
+
+def token_claims(user):
+    """Claims ajoutés au JWT à la connexion."""
+    return {
+        'is_admin': bool(user.is_admin),
+        'roles': ['admin', 'player'] if user.is_admin else ['player']
+    }
+
+
+class IdentityCache:
+    """Cache court des informations d'identité, par utilisateur.
+
+    Évite une requête par appel pour relire `is_admin` ou le nom de
+    l'utilisateur. Les routes qui modifient ces champs appellent
+    `invalidate` ; IDENTITY_CACHE_TTL borne le délai sur les autres workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def init_app(self, app):
+        app.config.setdefault('IDENTITY_CACHE_TTL', 30)
+        app.config.setdefault('IDENTITY_CACHE_SIZE', 10000)
+        app.extensions['identity_cache'] = self
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry.loaded_at <= current_app.config['IDENTITY_CACHE_TTL']:
+            return entry
+
+        from .models import db, User
+
+        row = db.session.query(
+            User.id, User.username, User.email, User.is_admin, User.created_at
+        ).filter_by(id=user_id).first()
+        if row is None:
+            self.invalidate(user_id)
+            return None
+
+        entry = Identity(
+            id=row.id,
+            username=row.username,
+            email=row.email,
+            is_admin=bool(row.is_admin),
+            created_at=row.created_at,
+            loaded_at=time.monotonic()
+        )
+        with self._lock:
+            if len(self._entries) >= current_app.config['IDENTITY_CACHE_SIZE']:
+                self._entries.clear()
+            self._entries[user_id] = entry
+        return entry
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+identities = IdentityCache()
@@ -0,0 +1,233 @@
+import base64
+import bisect
+import binascii
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+
+
+class LeaderboardIndex:
+    """Classement en mémoire, trié par score décroissant.
+
+    Les égalités sont départagées par l'heure du dernier flag validé (le
+    plus ancien passe devant), puis par identifiant, ce qui rend l'ordre
+    déterministe et permet une pagination par curseur et un calcul de rang
+    par recherche dichotomique.
+
+    Chaque worker garde sa propre copie : elle est mise à jour à chaque
+    flag validé et reconstruite depuis la base quand elle a dépassé
+    LEADERBOARD_MAX_AGE secondes, ce qui resynchronise les workers entre eux.
+    Une seule reconstruction à la fois : pendant qu'elle tourne, les autres
+    lecteurs servent l'index périmé au lieu d'interroger la base à leur tour.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._keys = []
+        self._entries = {}
+        self._built_at = None
+        self._frozen = False
+
+    def init_app(self, app):
+        app.config.setdefault('LEADERBOARD_MAX_AGE', 30)
+        app.extensions['leaderboard'] = self
+
+    @staticmethod
+    def _key(entry):
+        return (-entry['score'], entry['last_solve'], entry['id'])
+
+    @staticmethod
+    def _timestamp(solved_at):
+        if solved_at is None:
+            return math.inf
+        if isinstance(solved_at, str):
+            solved_at = datetime.fromisoformat(solved_at)
+        return solved_at.replace(tzinfo=timezone.utc).timestamp()
+
+    @staticmethod
+    def encode_cursor(entry):
+        raw = f"{entry['score']}:{entry['last_solve']!r}:{entry['id']}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            score, last_solve, user_id = raw.split(':')
+            return (-int(score), float(last_solve), int(user_id))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise ValueError('Invalid cursor')
+
+    def rebuild(self):
+        from .models import db, User, SolvedChallenge
+
+        rows = db.session.query(
+            User.id,
+            User.username,
+            User.score,
+            db.func.count(SolvedChallenge.id),
+            db.func.max(SolvedChallenge.solved_at)
+        ).outerjoin(SolvedChallenge, SolvedChallenge.user_id == User.id) \
+         .group_by(User.id, User.username, User.score) \
+         .all()
+
+        entries = {
+            user_id: {
+                'id': user_id,
+                'username': username,
+                'score': score or 0,
+                'solved_challenges': solved,
+                'last_solve': self._timestamp(last_solve)
+            }
+            for user_id, username, score, solved, last_solve in rows
+        }
+        keys = sorted(self._key(entry) for entry in entries.values())
+
+        with self._lock:
+            self._entries = entries
+            self._keys = keys
+            self._built_at = time.monotonic()
+
+    @classmethod
+    def frozen(cls, entries):
+        """Index figé construit à partir d'un instantané (voir `snapshot`).
+
+        Il n'est jamais reconstruit depuis la base.
+        """
+        index = cls()
+        index._entries = {
+            entry['id']: dict(entry, last_solve=math.inf if entry['last_solve'] is None else entry['last_solve'])
+            for entry in entries
+        }
+        index._keys = sorted(index._key(entry) for entry in index._entries.values())
+        index._built_at = time.monotonic()
+        index._frozen = True
+        return index
+
+    def snapshot(self):
+        """Entrées du classement, dans l'ordre, sérialisables en JSON."""
+        self._ensure_fresh()
+        with self._lock:
+            return [
+                dict(self._entries[key[-1]], last_solve=None if math.isinf(key[1]) else key[1])
+                for key in self._keys
+            ]
+
+    def _stale(self):
+        max_age = current_app.config.get('LEADERBOARD_MAX_AGE', 30)
+        return self._built_at is None or time.monotonic() - self._built_at > max_age
+
+    def _ensure_fresh(self):
+        if self._frozen or not self._stale():
+            return
+        # Sans index à servir (premier appel), on attend la reconstruction
+        # en cours ; sinon l'index périmé fait l'affaire
+        if not self._rebuild_lock.acquire(blocking=not self._entries):
+            return
+        try:
+            if self._stale():
+                self.rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+    def _remove(self, entry):
+        key = self._key(entry)
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def add_user(self, user_id, username):
+        with self._lock:
+            if self._built_at is None or user_id in self._entries:
+                return
+            entry = {
+                'id': user_id,
+                'username': username,
+                'score': 0,
+                'solved_challenges': 0,
+                'last_solve': math.inf
+            }
+            self._entries[user_id] = entry
+            bisect.insort(self._keys, self._key(entry))
+
+    def record_solve(self, user_id, points, solved_at=None):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                # Utilisateur inconnu de cet index : la prochaine
+                # reconstruction le rattrapera.
+                self._built_at = None
+                return
+            self._remove(entry)
+            entry['score'] += points
+            entry['solved_challenges'] += 1
+            entry['last_solve'] = self._timestamp(solved_at or datetime.utcnow())
+            bisect.insort(self._keys, self._key(entry))
+
+    def apply_delta(self, user_ids, delta):
+        """Ajoute `delta` au score de plusieurs utilisateurs (score dynamique)."""
+        with self._lock:
+            if self._built_at is None:
+                return
+            entries = [self._entries[user_id] for user_id in user_ids if user_id in self._entries]
+            if len(entries) != len(user_ids):
+                self._built_at = None
+            if len(entries) * 8 < len(self._keys):
+                for entry in entries:
+                    self._remove(entry)
+                    entry['score'] += delta
+                    bisect.insort(self._keys, self._key(entry))
+            else:
+                # Beaucoup de solveurs : un tri complet coûte moins que
+                # des insertions une à une
+                for entry in entries:
+                    entry['score'] += delta
+                self._keys = sorted(self._key(entry) for entry in self._entries.values())
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def slice(self, offset=0, limit=10):
+        self._ensure_fresh()
+        offset = max(offset, 0)
+        limit = max(limit, 0)
+        with self._lock:
+            return self._window(offset, limit)
+
+    def _window(self, offset, limit):
+        keys = self._keys[offset:offset + limit]
+        return [
+            dict(self._entries[key[-1]], rank=offset + position + 1)
+            for position, key in enumerate(keys)
+        ]
+
+    def top(self, limit=10):
+        return self.slice(0, limit)
+
+    def after(self, cursor, limit=10):
+        """Renvoie les entrées qui suivent le curseur (keyset pagination)."""
+        key = self.decode_cursor(cursor)
+        self._ensure_fresh()
+        with self._lock:
+            offset = bisect.bisect_right(self._keys, key)
+            return self._window(offset, max(limit, 0))
+
+    def rank(self, user_id):
+        self._ensure_fresh()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            rank = bisect.bisect_left(self._keys, self._key(entry)) + 1
+            return dict(entry, rank=rank)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+leaderboard = LeaderboardIndex()
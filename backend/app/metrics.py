@@ -0,0 +1,202 @@
+import bisect
+import contextvars
+import threading
+import time
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Bornes des histogrammes (la dernière tranche, +Inf, est implicite)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Compteurs de la requête en cours : [requêtes SQL, secondes passées en base]
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'total')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.total}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+class EndpointMetrics:
+    __slots__ = ('latency', 'queries', 'db_seconds', 'size', 'statuses')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+
+
+class RequestMetrics:
+    """Mesures par endpoint, exposées au format texte de Prometheus.
+
+    Les hooks de requête Flask mesurent la durée de traitement, le code
+    de réponse et la taille du corps ; les évènements du moteur
+    SQLAlchemy comptent les requêtes SQL et leur durée pour la requête
+    HTTP en cours. Chaque enregistrement ne coûte que quelques additions
+    sous un verrou, de quoi rester actif en production.
+
+    Les compteurs sont propres à chaque worker. Au-delà de
+    METRICS_SLOW_QUERY_COUNT requêtes SQL, la requête HTTP est journalisée
+    pour repérer les N+1.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._listening = False
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_SLOW_QUERY_COUNT', 25)
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        if not self._listening:
+            # Tous les moteurs : les requêtes hors requête HTTP (écritures
+            # par lots en arrière-plan) ne sont pas comptées
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor)
+            self._listening = True
+
+    @staticmethod
+    def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+        state = _current.get()
+        started = conn.info.get('metrics_started')
+        if state is not None and started:
+            state[0] += 1
+            state[1] += time.perf_counter() - started.pop()
+
+    def _start(self):
+        request.environ['metrics.token'] = _current.set([0, 0.0])
+        request.environ['metrics.started'] = time.perf_counter()
+
+    def _finish(self, response):
+        started = request.environ.get('metrics.started')
+        state = _current.get()
+        if started is None or state is None:
+            return response
+        elapsed = time.perf_counter() - started
+        queries, db_seconds = state
+        endpoint = request.endpoint or 'unmatched'
+        # Corps en flux (SSE, fichiers) : taille inconnue ici
+        size = None if response.is_streamed else response.calculate_content_length()
+
+        with self._lock:
+            metrics = self._endpoints.get((endpoint, request.method))
+            if metrics is None:
+                metrics = self._endpoints[(endpoint, request.method)] = EndpointMetrics()
+            metrics.latency.observe(elapsed)
+            metrics.queries.observe(queries)
+            metrics.db_seconds += db_seconds
+            if size is not None:
+                metrics.size.observe(size)
+            metrics.statuses[response.status_code] = metrics.statuses.get(response.status_code, 0) + 1
+
+        if queries > current_app.config['METRICS_SLOW_QUERY_COUNT']:
+            current_app.logger.warning('%s %s issued %d SQL queries (%.1f ms in database)',
+                                       request.method, endpoint, queries, db_seconds * 1000)
+        return response
+
+    @staticmethod
+    def _teardown(exc=None):
+        token = request.environ.pop('metrics.token', None)
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                # Fin d'un flux servi dans un autre contexte
+                _current.set(None)
+
+    def render(self):
+        """Texte au format d'exposition de Prometheus (version 0.0.4)."""
+        from .ratelimit import limiter
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = [
+                '# HELP ctf_http_request_duration_seconds Request handling time.',
+                '# TYPE ctf_http_request_duration_seconds histogram',
+            ]
+            for (endpoint, method), metrics in endpoints:
+                lines.extend(metrics.latency.lines('ctf_http_request_duration_seconds',
+                                                   f'endpoint="{endpoint}",method="{method}"'))
+            lines += [
+                '# HELP ctf_http_requests_total Requests by response status.',
+                '# TYPE ctf_http_requests_total counter',
+            ]
+            for (endpoint, method), metrics in endpoints:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f'ctf_http_requests_total{{endpoint="{endpoint}",method="{method}",'
+                                 f'status="{status}"}} {count}')
+            lines += [
+                '# HELP ctf_http_request_db_queries SQL queries issued per request.',
+                '# TYPE ctf_http_request_db_queries histogram',
+            ]
+            for (endpoint, method), metrics in endpoints:
+                lines.extend(metrics.queries.lines('ctf_http_request_db_queries',
+                                                   f'endpoint="{endpoint}",method="{method}"'))
+            lines += [
+                '# HELP ctf_http_request_db_seconds_total Time spent in SQL queries.',
+                '# TYPE ctf_http_request_db_seconds_total counter',
+            ]
+            for (endpoint, method), metrics in endpoints:
+                lines.append(f'ctf_http_request_db_seconds_total{{endpoint="{endpoint}",method="{method}"}} '
+                             f'{metrics.db_seconds:.6f}')
+            lines += [
+                '# HELP ctf_http_response_size_bytes Response body size (streamed bodies excluded).',
+                '# TYPE ctf_http_response_size_bytes histogram',
+            ]
+            for (endpoint, method), metrics in endpoints:
+                lines.extend(metrics.size.lines('ctf_http_response_size_bytes',
+                                                f'endpoint="{endpoint}",method="{method}"'))
+
+        lines += [
+            '# HELP ctf_ratelimit_decisions_total Rate limiter decisions by limit and scope.',
+            '# TYPE ctf_ratelimit_decisions_total counter',
+        ]
+        # Copies : les compteurs du limiteur sont modifiés sans verrou
+        for (name, scope), count in sorted(dict(limiter.allowed).items()):
+            lines.append(f'ctf_ratelimit_decisions_total{{limit="{name}",scope="{scope}",result="allowed"}} {count}')
+        for (name, scope), count in sorted(dict(limiter.rejected).items()):
+            lines.append(f'ctf_ratelimit_decisions_total{{limit="{name}",scope="{scope}",result="rejected"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def response(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+
+metrics = RequestMetrics()
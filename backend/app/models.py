@@ -1,6 +1,6 @@
 from datetime import datetime
 from . import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from .passwords import password_hasher
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -8,7 +8,7 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     score = db.Column(db.Integer, default=0)
@@ -17,10 +17,13 @@ class User(db.Model):
     solved_challenges = db.relationship('SolvedChallenge', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
 
 class Challenge(db.Model):
     __tablename__ = 'challenges'
@@ -30,11 +33,18 @@ class Challenge(db.Model):
     description = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50), nullable=False)  # Wireless, IoT, etc.
     difficulty = db.Column(db.String(20), nullable=False)  # Easy, Medium, Hard
-    points = db.Column(db.Integer, nullable=False)
-    flag = db.Column(db.String(100), nullable=False)
+    points = db.Column(db.Integer, nullable=False)  # Valeur courante, recalculée en mode dynamique
+    flag = db.Column(db.Text, nullable=False)  # Un flag accepté par ligne
+    flag_mode = db.Column(db.String(20), nullable=False, default='exact')  # exact, case_insensitive, regex
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
+    # Score dynamique : static, linear ou logarithmic (voir scoring.challenge_value)
+    scoring = db.Column(db.String(20), nullable=False, default='static')
+    initial_points = db.Column(db.Integer)
+    minimum_points = db.Column(db.Integer)
+    decay = db.Column(db.Integer)
+    
     # Fichiers associés (PCAP, firmware, etc.)
     file_path = db.Column(db.String(200))
     file_type = db.Column(db.String(50))  # PCAP, BIN, etc.
@@ -50,8 +60,63 @@ class SolvedChallenge(db.Model):
     challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=False)
     solved_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Pour éviter les doublons
-    __table_args__ = (db.UniqueConstraint('user_id', 'challenge_id'),)
+    # Pour éviter les doublons ; l'index sur challenge_id sert à retrouver
+    # les solveurs d'un challenge (score dynamique, statistiques)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'challenge_id'),
+        db.Index('ix_solved_challenges_challenge_id', 'challenge_id'),
+    )
+
+class Submission(db.Model):
+    __tablename__ = 'submissions'
+    
+    # Journal en ajout seul : pas de clé étrangère, pour que l'écriture par
+    # lots ne dépende pas de l'existence des lignes référencées
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    challenge_id = db.Column(db.Integer, nullable=False)
+    is_correct = db.Column(db.Boolean, nullable=False)
+    flag = db.Column(db.String(200))
+    ip = db.Column(db.String(45))
+    submitted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_submissions_user_submitted_at', 'user_id', 'submitted_at'),
+        db.Index('ix_submissions_challenge_submitted_at', 'challenge_id', 'submitted_at'),
+    )
+
+class ScoreCheckpoint(db.Model):
+    __tablename__ = 'score_checkpoints'
+    
+    # Score cumulé d'un utilisateur ou d'une équipe après chaque
+    # changement, pour les graphes du classement. Table étroite en ajout
+    # seul, sans clé étrangère (écrite par lots comme submissions)
+    id = db.Column(db.Integer, primary_key=True)
+    subject_type = db.Column(db.String(4), nullable=False)  # user, team
+    subject_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_score_checkpoints_subject', 'subject_type', 'subject_id', 'recorded_at'),
+    )
+
+class Setting(db.Model):
+    __tablename__ = 'settings'
+    
+    # État partagé entre les workers (version du catalogue, gel du classement...)
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Text)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ArtifactRef(db.Model):
+    __tablename__ = 'artifact_refs'
+    
+    # Nombre de challenges qui pointent vers un fichier, modifié dans la même
+    # transaction que les challenges (voir ArtifactStore)
+    path = db.Column(db.String(200), primary_key=True)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
 
 class Team(db.Model):
     __tablename__ = 'teams'
@@ -59,11 +124,25 @@ class Team(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    score = db.Column(db.Integer, default=0)
+    score = db.Column(db.Integer, default=0, index=True)
     
     # Relations
     members = db.relationship('User', secondary='team_members', backref='teams')
 
+class TeamSolve(db.Model):
+    __tablename__ = 'team_solves'
+    
+    # Un challenge ne rapporte des points qu'une fois par équipe
+    id = db.Column(db.Integer, primary_key=True)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=False)
+    solved_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('team_id', 'challenge_id'),
+        db.Index('ix_team_solves_challenge_id', 'challenge_id'),
+    )
+
 # Table d'association pour les membres d'équipe
 team_members = db.Table('team_members',
     db.Column('team_id', db.Integer, db.ForeignKey('teams.id'), primary_key=True),
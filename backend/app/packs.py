@@ -0,0 +1,212 @@
+import json
+import os
+import shutil
+
+from .artifacts import artifacts, ArtifactStore, DIGEST_RE
+from .catalog import catalog
+from .events import events
+from .flags import validate_flag, flag_cache
+from .scoring import validate_scoring, revalue_challenges, reprice_challenges, publish_revalued
+
+# Champs d'un challenge dans un pack, dans l'ordre de l'export
+PACK_FIELDS = ('title', 'description', 'category', 'difficulty', 'points', 'flag', 'flag_mode', 'is_active',
+               'scoring', 'initial_points', 'minimum_points', 'decay')
+REQUIRED_FIELDS = ('title', 'description', 'category', 'difficulty', 'points', 'flag')
+
+BATCH_SIZE = 500
+
+
+class PackError(ValueError):
+    pass
+
+
+def read_manifest(stream):
+    """Lit un pack : tableau JSON, objet {"challenges": [...]} ou NDJSON.
+
+    `stream` est un flux binaire ; en NDJSON il est lu ligne par ligne.
+    """
+    first = b''
+    while not first.strip():
+        first = stream.readline()
+        if not first:
+            return
+    head = first.lstrip()
+    if head.startswith(b'['):
+        document = json.loads(first + stream.read())
+        yield from enumerate(document, 1)
+        return
+    try:
+        entry = json.loads(first)
+    except ValueError:
+        # Objet JSON indenté sur plusieurs lignes
+        document = json.loads(first + stream.read())
+        yield from enumerate(document.get('challenges', []) if isinstance(document, dict) else document, 1)
+        return
+    if isinstance(entry, dict) and 'challenges' in entry:
+        yield from enumerate(entry['challenges'], 1)
+        return
+    yield 1, entry
+    for number, line in enumerate(stream, 2):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                raise PackError(f'line {number}: invalid JSON ({e})')
+
+
+def _row(number, entry, artifacts_dir):
+    if not isinstance(entry, dict):
+        raise PackError(f'entry {number}: expected an object')
+    missing = [field for field in REQUIRED_FIELDS if entry.get(field) in (None, '')]
+    if missing:
+        raise PackError(f"entry {number}: missing {', '.join(missing)}")
+
+    row = {field: entry[field] for field in PACK_FIELDS if field in entry}
+    row.setdefault('flag_mode', 'exact')
+    row.setdefault('is_active', True)
+    try:
+        row['points'] = int(row['points'])
+    except (TypeError, ValueError):
+        raise PackError(f'entry {number}: points must be an integer')
+    error = validate_flag(row['flag'], row['flag_mode'])
+    if error:
+        raise PackError(f'entry {number}: {error}')
+    row.setdefault('scoring', 'static')
+    if row['scoring'] != 'static':
+        row.setdefault('initial_points', row['points'])
+    error = validate_scoring(row['scoring'], row.get('initial_points'), row.get('minimum_points'), row.get('decay'))
+    if error:
+        raise PackError(f'entry {number}: {error}')
+
+    # Fichier : blob déjà présent (artifact), ou fichier du dossier
+    # d'artefacts, désigné par son chemin (file) ou par son empreinte.
+    # La copie dans le stockage attend que tout le pack soit validé.
+    digest = entry.get('artifact')
+    source = None
+    if digest and not DIGEST_RE.fullmatch(str(digest)):
+        raise PackError(f'entry {number}: artifact must be a SHA-256 hex digest')
+    if entry.get('file'):
+        if artifacts_dir is None:
+            raise PackError(f'entry {number}: "file" requires an artifacts directory')
+        source = os.path.realpath(os.path.join(artifacts_dir, entry['file']))
+        if os.path.commonpath([os.path.realpath(artifacts_dir), source]) != os.path.realpath(artifacts_dir):
+            raise PackError(f'entry {number}: file is outside the artifacts directory')
+        if not os.path.isfile(source):
+            raise PackError(f'entry {number}: file not found')
+        digest = None
+    elif digest and not artifacts.exists(digest):
+        source = os.path.join(artifacts_dir, digest) if artifacts_dir else None
+        if source is None or not os.path.isfile(source):
+            raise PackError(f'entry {number}: unknown artifact {digest}')
+    if digest and source is None:
+        row['file_path'] = artifacts.blob_path(digest)
+    if digest or source:
+        row['file_type'] = entry.get('file_type') or os.path.basename(entry.get('file') or digest).split('.')[-1]
+    return row, (number, source, digest) if source else None
+
+
+def _store_files(rows, sources, stored):
+    """Copie les fichiers du pack validé ; `stored` reçoit les chemins écrits."""
+    for title, (number, source, expected) in sources.items():
+        with open(source, 'rb') as stream:
+            path, digest, _ = artifacts.store(stream)
+        stored.append(path)
+        if expected and digest != expected:
+            raise PackError(f'entry {number}: artifact content does not match {expected}')
+        rows[title]['file_path'] = path
+
+
+def import_pack(stream, artifacts_dir=None):
+    """Insère ou met à jour (par titre) les challenges d'un pack.
+
+    Tout le pack est validé avant la copie des fichiers, puis écrit dans
+    une seule transaction : compteurs de références des fichiers, INSERT
+    et UPDATE groupés, puis recalcul des challenges dynamiques mis à jour
+    (un UPDATE par table). Une erreur n'applique rien et supprime les
+    fichiers copiés qui ne sont pas référencés. Renvoie (créés, mis à jour).
+    """
+    from .models import db, Challenge
+
+    rows = {}
+    sources = {}
+    for number, entry in read_manifest(stream):
+        row, source = _row(number, entry, artifacts_dir)
+        if row['title'] in rows:
+            raise PackError(f"entry {number}: duplicate title {row['title']!r}")
+        rows[row['title']] = row
+        if source:
+            sources[row['title']] = source
+    if not rows:
+        return 0, 0
+
+    stored = []
+    try:
+        _store_files(rows, sources, stored)
+
+        existing = {}
+        titles = list(rows)
+        for start in range(0, len(titles), BATCH_SIZE):
+            batch = titles[start:start + BATCH_SIZE]
+            for challenge_id, title, file_path, points in db.session.query(
+                Challenge.id, Challenge.title, Challenge.file_path, Challenge.points
+            ).filter(Challenge.title.in_(batch)).order_by(Challenge.id.desc()):
+                existing[title] = (challenge_id, file_path, points)
+
+        # Challenge dynamique existant : la valeur courante (`points`) reste
+        # celle déjà créditée aux solveurs, le recalcul applique l'écart
+        inserts = [dict(row, points=row.get('initial_points', row['points'])) for title, row in rows.items()
+                   if title not in existing]
+        updates = [dict({k: v for k, v in row.items() if k != 'points' or row['scoring'] == 'static'},
+                        id=existing[title][0])
+                   for title, row in rows.items() if title in existing]
+        replaced = [existing[row['title']][1] for row in updates
+                    if 'file_path' in row and existing[row['title']][1] != row['file_path']]
+        artifacts.acquire([row['file_path'] for row in inserts if 'file_path' in row] +
+                          [row['file_path'] for row in updates
+                           if 'file_path' in row and existing[row['title']][1] != row['file_path']])
+        artifacts.release(replaced)
+        if inserts:
+            db.session.execute(db.insert(Challenge), inserts)
+        if updates:
+            db.session.execute(db.update(Challenge), updates)
+        revalued = revalue_challenges([row['id'] for row in updates if row['scoring'] != 'static'])
+        repriced = reprice_challenges({row['id']: (existing[row['title']][2], row['points'])
+                                       for row in updates if row['scoring'] == 'static'})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        artifacts.collect(stored)
+        raise
+
+    artifacts.collect(replaced)
+    publish_revalued(*revalued)
+    publish_revalued(*repriced)
+    flag_cache.invalidate()
+    # Une seule nouvelle version du catalogue pour tout le pack
+    catalog.bump()
+    events.publish('challenge', {'action': 'imported', 'created': len(inserts), 'updated': len(updates)})
+    return len(inserts), len(updates)
+
+
+def export_pack(artifacts_dir=None):
+    """Génère le pack en NDJSON, ligne par ligne, sans charger le catalogue.
+
+    Avec `artifacts_dir`, les fichiers sont copiés sous leur empreinte.
+    """
+    from .models import db, Challenge
+    from .files import file_server
+
+    columns = [getattr(Challenge, field) for field in PACK_FIELDS]
+    query = db.session.query(*columns, Challenge.file_path, Challenge.file_type) \
+        .order_by(Challenge.id).execution_options(yield_per=BATCH_SIZE)
+    for row in query:
+        entry = {field: getattr(row, field) for field in PACK_FIELDS}
+        if row.file_path and os.path.exists(row.file_path):
+            digest = ArtifactStore.digest_of(row.file_path) or file_server.digest(row.file_path)
+            entry['artifact'] = digest
+            entry['file_type'] = row.file_type
+            if artifacts_dir is not None:
+                target = os.path.join(artifacts_dir, digest)
+                if not os.path.exists(target):
+                    shutil.copyfile(row.file_path, target)
+        yield json.dumps(entry, ensure_ascii=False) + '\n'
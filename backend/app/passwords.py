@@ -0,0 +1,126 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from flask import current_app, jsonify
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Paramètres complets des raccourcis Werkzeug, pour comparer aux hashs stockés
+WERKZEUG_DEFAULTS = {
+    'pbkdf2': 'pbkdf2:sha256:600000',
+    'pbkdf2:sha256': 'pbkdf2:sha256:600000',
+    'scrypt': 'scrypt:32768:8:1',
+}
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def _hash(password, method, rounds):
+    if method == 'bcrypt':
+        import bcrypt
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('ascii')
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pwhash, password):
+    if pwhash.startswith('$2'):
+        import bcrypt
+        return bcrypt.checkpw(password.encode('utf-8'), pwhash.encode('ascii'))
+    return check_password_hash(pwhash, password)
+
+
+class PasswordHasher:
+    """Hachage et vérification des mots de passe hors du thread de requête.
+
+    Les calculs tournent dans un pool de PASSWORD_HASH_WORKERS processus ;
+    au-delà de PASSWORD_HASH_MAX_PENDING calculs en attente, la requête est
+    refusée tout de suite (503) au lieu de bloquer le worker. Avec
+    PASSWORD_HASH_WORKERS = 0 le calcul reste dans le processus courant.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._pending = 0
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+        app.config.setdefault('PASSWORD_BCRYPT_ROUNDS', 12)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', 2)
+        app.config.setdefault('PASSWORD_HASH_MAX_PENDING', 32)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10)
+        app.extensions['password_hasher'] = self
+        app.register_error_handler(HashingBusy, self._busy)
+
+    @staticmethod
+    def _busy(error):
+        response = jsonify({'error': 'Server busy, please retry'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    def _executor(self):
+        # Un pool par processus : celui du maître n'est pas utilisable
+        # après le fork des workers gunicorn
+        if self._pool is None or self._pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=current_app.config['PASSWORD_HASH_WORKERS'])
+            self._pid = os.getpid()
+        return self._pool
+
+    def _run(self, fn, *args):
+        config = current_app.config
+        if not config['PASSWORD_HASH_WORKERS']:
+            return fn(*args)
+
+        with self._lock:
+            if self._pending >= config['PASSWORD_HASH_MAX_PENDING']:
+                raise HashingBusy()
+            self._pending += 1
+            executor = self._executor()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # La place n'est libérée qu'une fois le calcul terminé ou annulé :
+        # une requête abandonnée ne doit pas laisser un calcul en file hors
+        # du compte de PASSWORD_HASH_MAX_PENDING
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=config['PASSWORD_HASH_TIMEOUT'])
+        except TimeoutError:
+            # Retire le calcul de la file s'il n'a pas encore démarré
+            future.cancel()
+            raise HashingBusy()
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _method(self):
+        method = current_app.config['PASSWORD_HASH_METHOD']
+        return WERKZEUG_DEFAULTS.get(method, method)
+
+    def hash(self, password):
+        return self._run(_hash, password, self._method(), current_app.config['PASSWORD_BCRYPT_ROUNDS'])
+
+    def verify(self, pwhash, password):
+        if not pwhash:
+            return False
+        return self._run(_verify, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        method = self._method()
+        if method == 'bcrypt':
+            rounds = current_app.config['PASSWORD_BCRYPT_ROUNDS']
+            return not pwhash.startswith(('$2b$%02d$' % rounds, '$2a$%02d$' % rounds))
+        return pwhash.split('$', 1)[0] != method
+
+    @property
+    def pending(self):
+        return self._pending
+
+
+password_hasher = PasswordHasher()
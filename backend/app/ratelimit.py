@@ -0,0 +1,179 @@
+import functools
+import math
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, jsonify, request
+
+DEFAULT_LIMITS = {
+    # capacité/période en secondes. Les seaux par IP restent larges : une
+    # salle de TP ou un réseau d'entreprise partage souvent une seule IP.
+    'submit': {'user': '10/60', 'ip': '120/60', 'challenge': '5/60'},
+    'login': {'user': '5/60', 'ip': '100/60'},
+}
+
+
+def parse_limit(limit):
+    capacity, period = limit.split('/')
+    capacity = float(capacity)
+    return capacity, capacity / float(period)
+
+
+class MemoryBackend:
+    """Seaux à jetons locaux au worker."""
+
+    max_keys = 100000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def consume(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                wait = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (cost - tokens) / rate
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return wait == 0, wait
+
+    def _prune(self, now):
+        # Un seau inactif depuis longtemps est plein : inutile de le garder
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if now - updated > 3600:
+                del self._buckets[key]
+
+
+class RedisBackend:
+    """Seaux à jetons partagés entre workers, stockés dans Redis.
+
+    Tout client exposant `register_script` (redis-py, fakeredis...) convient.
+    """
+
+    script = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self._consume = client.register_script(self.script)
+        self._prefix = prefix
+
+    @classmethod
+    def from_url(cls, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RATELIMIT_BACKEND=redis requires the redis package')
+        return cls(redis.Redis.from_url(url))
+
+    def consume(self, key, capacity, rate, cost=1):
+        wait = float(self._consume(keys=[self._prefix + key], args=[capacity, rate, time.time(), cost]))
+        return wait == 0, wait
+
+
+class RateLimiter:
+    def __init__(self):
+        self.backend = None
+        self.allowed = Counter()
+        self.rejected = Counter()
+
+    def init_app(self, app, backend=None):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_BACKEND', 'memory')
+        app.config.setdefault('RATELIMIT_REDIS_URL', 'redis://localhost:6379/0')
+        app.config.setdefault('RATELIMIT_SUBMIT_IP', None)
+        app.config.setdefault('RATELIMIT_LOGIN_IP', None)
+        limits = app.config.setdefault(
+            'RATELIMIT_LIMITS', {name: dict(scopes) for name, scopes in DEFAULT_LIMITS.items()})
+        for name in ('submit', 'login'):
+            ip_limit = app.config[f'RATELIMIT_{name.upper()}_IP']
+            if ip_limit:
+                parse_limit(ip_limit)  # erreur de format dès le démarrage
+                limits.setdefault(name, {})['ip'] = ip_limit
+
+        if backend is not None:
+            self.backend = backend
+        elif app.config['RATELIMIT_BACKEND'] == 'redis':
+            self.backend = RedisBackend.from_url(app.config['RATELIMIT_REDIS_URL'])
+        else:
+            self.backend = MemoryBackend()
+        app.extensions['ratelimit'] = self
+
+    def check(self, name, scopes):
+        limits = current_app.config['RATELIMIT_LIMITS'].get(name, {})
+        retry_after = 0
+        for scope, key_func in scopes.items():
+            if scope not in limits:
+                continue
+            key = key_func()
+            if key is None:
+                continue
+            capacity, rate = parse_limit(limits[scope])
+            allowed, wait = self.backend.consume(f'{name}:{scope}:{key}', capacity, rate)
+            if allowed:
+                self.allowed[(name, scope)] += 1
+            else:
+                self.rejected[(name, scope)] += 1
+                retry_after = max(retry_after, wait)
+        return retry_after
+
+    def limit(self, name, **scopes):
+        """Décorateur : applique les seaux `name` configurés pour chaque portée.
+
+        Chaque argument nommé associe une portée (user, ip, challenge...) à
+        une fonction qui renvoie la clé du seau pour la requête courante.
+        Le contrôle se fait avant tout accès à la base.
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if current_app.config['RATELIMIT_ENABLED']:
+                    retry_after = self.check(name, scopes)
+                    if retry_after:
+                        response = jsonify({'error': 'Too many requests'})
+                        response.headers['Retry-After'] = str(math.ceil(retry_after))
+                        return response, 429
+                return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        return {
+            f'{name}_{scope}': {
+                'allowed': self.allowed[(name, scope)],
+                'rejected': self.rejected[(name, scope)]
+            }
+            for name, scope in sorted(set(self.allowed) | set(self.rejected))
+        }
+
+
+def remote_addr():
+    # Derrière un proxy, remote_addr n'est l'IP du client que si
+    # PROXY_FIX_X_FOR est réglé (voir create_app)
+    return request.remote_addr
+
+
+limiter = RateLimiter()
@@ -1,22 +1,78 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from ..models import User, Challenge, db
+from ..events import events
+from ..flags import validate_flag, flag_cache
+from ..ratelimit import limiter
+from ..catalog import catalog
+from ..identity import identities
+from ..stats import admin_stats
+from ..scoring import validate_scoring, revalue_challenges, reprice_challenges, publish_revalued
+from ..artifacts import artifacts, ArtifactError
+from ..packs import import_pack, export_pack, PackError
+from ..freeze import scoreboard_freeze
+from ..metrics import metrics
+from werkzeug.http import parse_content_range_header
 from werkzeug.utils import secure_filename
-import os
 
 admin_bp = Blueprint('admin', __name__)
 
 def admin_required(fn):
     @jwt_required()
     def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user or not user.is_admin:
+        # Refus immédiat, sans requête, si le token ne porte pas le rôle
+        if get_jwt().get('is_admin') is False:
+            return jsonify({'error': 'Admin privileges required'}), 403
+        # Confirmation via le cache d'identité, pour qu'une rétrogradation
+        # prenne effet sans attendre l'expiration du token
+        identity = identities.get(get_jwt_identity())
+        if not identity or not identity.is_admin:
             return jsonify({'error': 'Admin privileges required'}), 403
         return fn(*args, **kwargs)
     wrapper.__name__ = fn.__name__
     return wrapper
 
+SCORING_FIELDS = ('scoring', 'initial_points', 'minimum_points', 'decay')
+
+def _scoring_fields(data, challenge=None):
+    # Paramètres du score dynamique, complétés par les valeurs actuelles
+    fields = {field: getattr(challenge, field, None) for field in SCORING_FIELDS}
+    fields['scoring'] = data.get('scoring', fields['scoring'] or 'static')
+    try:
+        for field in SCORING_FIELDS[1:]:
+            if data.get(field, '') != '':
+                fields[field] = int(data[field])
+        # En mode dynamique, `points` désigne la valeur initiale : la
+        # valeur courante n'est modifiée que par le recalcul
+        if fields['scoring'] != 'static' and data.get('points') and not data.get('initial_points'):
+            fields['initial_points'] = int(data['points'])
+    except ValueError:
+        return None, 'Scoring parameters must be integers'
+    error = validate_scoring(fields['scoring'], fields['initial_points'], fields['minimum_points'], fields['decay'])
+    return fields, error
+
+def _attach_file(challenge, data, file):
+    # Fichier joint au formulaire, ou blob déjà reçu par une session
+    # d'envoi (champ `artifact`). Les compteurs de références sont mis à
+    # jour dans la transaction du challenge ; renvoie l'ancien chemin, à
+    # passer à artifacts.collect après la validation.
+    if file:
+        path, _, _ = artifacts.store(file.stream)
+        filename = secure_filename(file.filename)
+    elif data.get('artifact'):
+        if not artifacts.exists(data['artifact']):
+            raise ArtifactError('Unknown artifact')
+        path = artifacts.blob_path(data['artifact'])
+        filename = secure_filename(data.get('filename', data['artifact']))
+    else:
+        return None
+    previous = challenge.file_path
+    artifacts.acquire([path])
+    artifacts.release([previous])
+    challenge.file_path = path
+    challenge.file_type = filename.split('.')[-1]
+    return previous
+
 @admin_bp.route('/users', methods=['GET'])
 @admin_required
 def get_users():
@@ -45,6 +101,7 @@ def update_user(user_id):
         user.is_admin = data['is_admin']
     
     db.session.commit()
+    identities.invalidate(user.id)
     
     return jsonify({
         'message': 'User updated successfully',
@@ -65,25 +122,36 @@ def create_challenge():
     if not all(k in data for k in ['title', 'description', 'category', 'difficulty', 'points', 'flag']):
         return jsonify({'error': 'Missing required fields'}), 400
     
+    flag_mode = data.get('flag_mode', 'exact')
+    error = validate_flag(data['flag'], flag_mode)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    scoring, error = _scoring_fields(data)
+    if error:
+        return jsonify({'error': error}), 400
+    
     challenge = Challenge(
         title=data['title'],
         description=data['description'],
         category=data['category'],
         difficulty=data['difficulty'],
-        points=int(data['points']),
-        flag=data['flag']
+        points=scoring['initial_points'] if scoring['scoring'] != 'static' else int(data['points']),
+        flag=data['flag'],
+        flag_mode=flag_mode,
+        **scoring
     )
     
-    if file:
-        filename = secure_filename(file.filename)
-        file_path = os.path.join('uploads', filename)
-        os.makedirs('uploads', exist_ok=True)
-        file.save(file_path)
-        challenge.file_path = file_path
-        challenge.file_type = filename.split('.')[-1]
+    try:
+        _attach_file(challenge, data, file)
+    except ArtifactError:
+        db.session.rollback()
+        raise
     
     db.session.add(challenge)
     db.session.commit()
+    catalog.bump()
+    events.publish('challenge', {'id': challenge.id, 'action': 'created', 'is_active': challenge.is_active})
     
     return jsonify({
         'message': 'Challenge created successfully',
@@ -92,7 +160,8 @@ def create_challenge():
             'title': challenge.title,
             'category': challenge.category,
             'difficulty': challenge.difficulty,
-            'points': challenge.points
+            'points': challenge.points,
+            'scoring': challenge.scoring
         }
     }), 201
 
@@ -106,6 +175,18 @@ def update_challenge(challenge_id):
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
+    if 'flag' in data or 'flag_mode' in data:
+        error = validate_flag(data.get('flag', challenge.flag), data.get('flag_mode', challenge.flag_mode))
+        if error:
+            return jsonify({'error': error}), 400
+    
+    rescore_needed = any(field in data for field in SCORING_FIELDS + ('points',))
+    scoring, error = _scoring_fields(data, challenge)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    previous_points = challenge.points
+    
     # Mise à jour des champs
     if 'title' in data:
         challenge.title = data['title']
@@ -115,27 +196,42 @@ def update_challenge(challenge_id):
         challenge.category = data['category']
     if 'difficulty' in data:
         challenge.difficulty = data['difficulty']
-    if 'points' in data:
+    for field, value in scoring.items():
+        setattr(challenge, field, value)
+    if 'points' in data and challenge.scoring == 'static':
         challenge.points = int(data['points'])
     if 'flag' in data:
         challenge.flag = data['flag']
+    if 'flag_mode' in data:
+        challenge.flag_mode = data['flag_mode']
     if 'is_active' in data:
         challenge.is_active = data['is_active'].lower() == 'true'
     
-    # Gestion du fichier
-    if file:
-        # Suppression de l'ancien fichier si existant
-        if challenge.file_path and os.path.exists(challenge.file_path):
-            os.remove(challenge.file_path)
-        
-        filename = secure_filename(file.filename)
-        file_path = os.path.join('uploads', filename)
-        os.makedirs('uploads', exist_ok=True)
-        file.save(file_path)
-        challenge.file_path = file_path
-        challenge.file_type = filename.split('.')[-1]
+    # Gestion du fichier : l'ancien blob n'est supprimé que s'il n'est
+    # plus utilisé par aucun challenge
+    try:
+        previous = _attach_file(challenge, data, file)
+    except ArtifactError:
+        db.session.rollback()
+        raise
+    
+    # Nouvelle valeur reportée sur les solveurs existants, dans la même
+    # transaction : valeur fixe modifiée, ou paramètres dynamiques recalculés
+    revalued = None
+    if challenge.scoring == 'static':
+        revalued = reprice_challenges({challenge.id: (previous_points, challenge.points)})
+    elif rescore_needed:
+        db.session.flush()
+        revalued = revalue_challenges([challenge.id])
     
     db.session.commit()
+    if previous != challenge.file_path:
+        artifacts.collect([previous])
+    if revalued:
+        publish_revalued(*revalued)
+    flag_cache.invalidate(challenge.id)
+    catalog.bump()
+    events.publish('challenge', {'id': challenge.id, 'action': 'updated', 'is_active': challenge.is_active})
     
     return jsonify({
         'message': 'Challenge updated successfully',
@@ -145,6 +241,7 @@ def update_challenge(challenge_id):
             'category': challenge.category,
             'difficulty': challenge.difficulty,
             'points': challenge.points,
+            'scoring': challenge.scoring,
             'is_active': challenge.is_active
         }
     }), 200
@@ -154,34 +251,124 @@ def update_challenge(challenge_id):
 def delete_challenge(challenge_id):
     challenge = Challenge.query.get_or_404(challenge_id)
     
-    # Suppression du fichier associé
-    if challenge.file_path and os.path.exists(challenge.file_path):
-        os.remove(challenge.file_path)
+    file_path = challenge.file_path
     
+    artifacts.release([file_path])
     db.session.delete(challenge)
     db.session.commit()
+    # Suppression du fichier associé s'il n'est pas partagé
+    artifacts.collect([file_path])
+    flag_cache.invalidate(challenge_id)
+    catalog.bump()
+    events.publish('challenge', {'id': challenge_id, 'action': 'deleted', 'is_active': False})
     
     return jsonify({'message': 'Challenge deleted successfully'}), 200
 
-@admin_bp.route('/stats', methods=['GET'])
+@admin_bp.route('/challenges/import', methods=['POST'])
 @admin_required
-def get_admin_stats():
-    total_users = User.query.count()
-    total_challenges = Challenge.query.count()
-    active_challenges = Challenge.query.filter_by(is_active=True).count()
-    
-    # Statistiques par catégorie
-    categories = db.session.query(Challenge.category, db.func.count(Challenge.id)).group_by(Challenge.category).all()
-    category_stats = {cat: count for cat, count in categories}
+def import_challenges():
+    # Corps brut : NDJSON (lu ligne par ligne) ou document JSON. Les
+    # fichiers sont référencés par empreinte (champ `artifact`), après un
+    # envoi par /uploads.
+    try:
+        created, updated = import_pack(request.stream)
+    except PackError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'created': created, 'updated': updated}), 200
+
+@admin_bp.route('/challenges/export', methods=['GET'])
+@admin_required
+def export_challenges():
+    return Response(
+        stream_with_context(export_pack()),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=challenges.ndjson'}
+    )
+
+@admin_bp.route('/uploads', methods=['POST'])
+@admin_required
+def create_upload():
+    upload_id = artifacts.open_session()
+    return jsonify({'upload_id': upload_id, 'offset': 0}), 201
+
+@admin_bp.route('/uploads/<upload_id>', methods=['GET'])
+@admin_required
+def get_upload(upload_id):
+    offset = artifacts.offset(upload_id)
+    if offset is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify({'upload_id': upload_id, 'offset': offset}), 200
+
+@admin_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@admin_required
+def upload_chunk(upload_id):
+    offset = artifacts.offset(upload_id)
+    if offset is None:
+        return jsonify({'error': 'Upload not found'}), 404
     
-    # Statistiques par difficulté
-    difficulties = db.session.query(Challenge.difficulty, db.func.count(Challenge.id)).group_by(Challenge.difficulty).all()
-    difficulty_stats = {diff: count for diff, count in difficulties}
+    # Sans Content-Range, le morceau est ajouté à la suite
+    start = offset
+    if 'Content-Range' in request.headers:
+        content_range = parse_content_range_header(request.headers['Content-Range'])
+        if content_range is None:
+            return jsonify({'error': 'Invalid Content-Range'}), 400
+        start = content_range.start
+    if start != offset:
+        # Morceau déjà reçu ou manquant : le client reprend à `offset`
+        return jsonify({'error': 'Unexpected offset', 'offset': offset}), 409
     
-    return jsonify({
-        'total_users': total_users,
-        'total_challenges': total_challenges,
-        'active_challenges': active_challenges,
-        'category_stats': category_stats,
-        'difficulty_stats': difficulty_stats
-    }), 200 
\ No newline at end of file
+    offset = artifacts.append(upload_id, request.stream, start)
+    return jsonify({'upload_id': upload_id, 'offset': offset}), 200
+
+@admin_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@admin_required
+def complete_upload(upload_id):
+    _, digest, size = artifacts.complete(upload_id)
+    return jsonify({'artifact': digest, 'size': size}), 201
+
+@admin_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+@admin_required
+def abort_upload(upload_id):
+    artifacts.abort(upload_id)
+    return jsonify({'message': 'Upload aborted'}), 200
+
+@admin_bp.route('/stats', methods=['GET'])
+@admin_required
+def get_admin_stats():
+    # Agrégats partagés entre administrateurs, recalculés au plus toutes
+    # les ADMIN_STATS_CACHE_SECONDS secondes
+    return jsonify(admin_stats.get()), 200
+
+@admin_bp.route('/scoreboard/freeze', methods=['GET'])
+@admin_required
+def get_scoreboard_freeze():
+    frozen = scoreboard_freeze.current()
+    return jsonify({'frozen_at': frozen.frozen_at.isoformat() if frozen else None}), 200
+
+@admin_bp.route('/scoreboard/freeze', methods=['POST'])
+@admin_required
+def freeze_scoreboard():
+    # Instantané des classements ; les résolutions restent comptées
+    if scoreboard_freeze.current():
+        return jsonify({'error': 'Scoreboard is already frozen'}), 400
+    frozen_at = scoreboard_freeze.freeze()
+    return jsonify({'message': 'Scoreboard frozen', 'frozen_at': frozen_at.isoformat()}), 200
+
+@admin_bp.route('/scoreboard/freeze', methods=['DELETE'])
+@admin_required
+def unfreeze_scoreboard():
+    if not scoreboard_freeze.current():
+        return jsonify({'error': 'Scoreboard is not frozen'}), 400
+    scoreboard_freeze.unfreeze()
+    return jsonify({'message': 'Scoreboard unfrozen'}), 200
+
+@admin_bp.route('/ratelimit', methods=['GET'])
+@admin_required
+def get_ratelimit_stats():
+    return jsonify({'ratelimit': limiter.stats()}), 200
+
+@admin_bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    # Format texte de Prometheus ; compteurs du worker qui répond
+    return metrics.response()
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from ..models import User, db
+from ..leaderboard import leaderboard
+from ..ratelimit import limiter, remote_addr
+from ..identity import identities, token_claims
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
@@ -28,10 +31,16 @@ def register():
     
     db.session.add(user)
     db.session.commit()
+    leaderboard.add_user(user.id, user.username)
     
     return jsonify({'message': 'User created successfully'}), 201
 
+def _login_username():
+    data = request.get_json(silent=True) or {}
+    return data.get('username')
+
 @auth_bp.route('/login', methods=['POST'])
+@limiter.limit('login', user=_login_username, ip=remote_addr)
 def login():
     data = request.get_json()
     
@@ -41,7 +50,12 @@ def login():
     user = User.query.filter_by(username=data['username']).first()
     
     if user and user.check_password(data['password']):
-        access_token = create_access_token(identity=user.id)
+        # Paramètres de hachage modifiés depuis : on refait le hash
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        
+        access_token = create_access_token(identity=user.id, additional_claims=token_claims(user))
         return jsonify({
             'access_token': access_token,
             'user': {
@@ -58,17 +72,20 @@ def login():
 @jwt_required()
 def get_current_user():
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = identities.get(user_id)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
+    # Score lu dans le classement en mémoire
+    entry = leaderboard.rank(user.id)
+    
     return jsonify({
         'id': user.id,
         'username': user.username,
         'email': user.email,
         'is_admin': user.is_admin,
-        'score': user.score,
+        'score': entry['score'] if entry else 0,
         'created_at': user.created_at.isoformat()
     }), 200
 
@@ -1,7 +1,17 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import Challenge, User, SolvedChallenge, db
-from datetime import datetime
+from ..models import Challenge, db
+from ..leaderboard import leaderboard
+from ..freeze import scoreboard_freeze
+from ..scoring import record_solve, publish_rescore, UnknownUser
+from ..flags import flag_cache
+from ..ratelimit import limiter, remote_addr
+from ..submission_log import submission_log
+from ..stats import user_stats
+from ..catalog import catalog
+from ..solved import solved_sets
+from ..files import file_server
+from ..history import score_history
 import os
 
 challenges_bp = Blueprint('challenges', __name__)
@@ -13,33 +23,18 @@ def get_challenges():
     category = request.args.get('category')
     difficulty = request.args.get('difficulty')
     
-    # Construction de la requête
-    query = Challenge.query.filter_by(is_active=True)
+    # Catalogue en cache, invalidé par les modifications des administrateurs
+    version = catalog.version()
+    challenges = catalog.challenges(category, difficulty)
     
-    if category:
-        query = query.filter_by(category=category)
-    if difficulty:
-        query = query.filter_by(difficulty=difficulty)
+    # Seule la partie propre à l'utilisateur est calculée à chaque requête
+    solved = solved_sets.get(get_jwt_identity())
     
-    challenges = query.all()
-    
-    # Récupération des challenges résolus par l'utilisateur
-    user_id = get_jwt_identity()
-    solved_challenges = SolvedChallenge.query.filter_by(user_id=user_id).all()
-    solved_ids = [sc.challenge_id for sc in solved_challenges]
-    
-    return jsonify({
-        'challenges': [{
-            'id': c.id,
-            'title': c.title,
-            'description': c.description,
-            'category': c.category,
-            'difficulty': c.difficulty,
-            'points': c.points,
-            'is_solved': c.id in solved_ids,
-            'created_at': c.created_at.isoformat()
-        } for c in challenges]
-    }), 200
+    response = jsonify({
+        'challenges': [dict(c, is_solved=bool(solved >> c['id'] & 1)) for c in challenges]
+    })
+    response.set_etag(catalog.etag(version, category, difficulty, format(solved, 'x')))
+    return response.make_conditional(request)
 
 @challenges_bp.route('/<int:challenge_id>', methods=['GET'])
 @jwt_required()
@@ -56,6 +51,7 @@ def get_challenge(challenge_id):
         'category': challenge.category,
         'difficulty': challenge.difficulty,
         'points': challenge.points,
+        'scoring': challenge.scoring,
         'created_at': challenge.created_at.isoformat(),
         'has_file': bool(challenge.file_path)
     }), 200
@@ -63,60 +59,107 @@ def get_challenge(challenge_id):
 @challenges_bp.route('/<int:challenge_id>/file', methods=['GET'])
 @jwt_required()
 def get_challenge_file(challenge_id):
-    challenge = Challenge.query.get_or_404(challenge_id)
+    challenge = db.session.query(
+        Challenge.is_active, Challenge.file_path, Challenge.file_type
+    ).filter_by(id=challenge_id).first()
+    
+    if challenge is None or not challenge.is_active:
+        return jsonify({'error': 'Challenge not found'}), 404
     
     if not challenge.file_path or not os.path.exists(challenge.file_path):
         return jsonify({'error': 'File not found'}), 404
     
-    return send_file(
+    # Range, ETag et If-None-Match gérés par file_server ; le transfert
+    # peut être délégué au proxy (FILE_OFFLOAD)
+    return file_server.send(
         challenge.file_path,
-        as_attachment=True,
         download_name=f"challenge_{challenge_id}_{challenge.file_type}"
     )
 
 @challenges_bp.route('/<int:challenge_id>/submit', methods=['POST'])
 @jwt_required()
+@limiter.limit(
+    'submit',
+    user=get_jwt_identity,
+    ip=remote_addr,
+    challenge=lambda: f"{get_jwt_identity()}:{request.view_args['challenge_id']}"
+)
 def submit_flag(challenge_id):
     user_id = get_jwt_identity()
-    user = User.query.get_or_404(user_id)
-    challenge = Challenge.query.get_or_404(challenge_id)
-    
-    # Vérification si le challenge est déjà résolu
-    if SolvedChallenge.query.filter_by(user_id=user_id, challenge_id=challenge_id).first():
-        return jsonify({'error': 'Challenge already solved'}), 400
     
     data = request.get_json()
     if not data or 'flag' not in data:
         return jsonify({'error': 'Flag is required'}), 400
     
-    if data['flag'] == challenge.flag:
-        # Création de l'entrée SolvedChallenge
-        solved = SolvedChallenge(user_id=user_id, challenge_id=challenge_id)
-        db.session.add(solved)
-        
-        # Mise à jour du score de l'utilisateur
-        user.score += challenge.points
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Correct flag!',
-            'points_earned': challenge.points
-        }), 200
-    
-    return jsonify({'error': 'Incorrect flag'}), 400
+    # Matcher compilé en cache : pas de lecture de la ligne complète
+    challenge = flag_cache.get(challenge_id)
+    if not challenge or not challenge.is_active:
+        return jsonify({'error': 'Challenge not found'}), 404
+    
+    is_correct = challenge.matcher.matches(data['flag'])
+    
+    # Journalisation différée : aucune écriture synchrone ici
+    submission_log.record(user_id, challenge_id, is_correct, data['flag'], request.remote_addr)
+    
+    if not is_correct:
+        return jsonify({'error': 'Incorrect flag'}), 400
+    
+    # Insertion de la résolution et mise à jour du score en une transaction
+    try:
+        result = record_solve(user_id, challenge_id, dynamic=challenge.scoring != 'static')
+    except UnknownUser:
+        return jsonify({'error': 'User not found'}), 404
+    if result is None:
+        return jsonify({'error': 'Challenge already solved'}), 400
+    
+    leaderboard.record_solve(user_id, result.points, result.solved_at)
+    user_stats.invalidate(user_id)
+    solved_sets.add(user_id, challenge_id)
+    score_history.record('user', user_id, result.score, result.solved_at)
+    if result.team_id is not None:
+        score_history.record('team', result.team_id, result.team_score, result.solved_at)
+    # Score dynamique : la nouvelle valeur a été reportée sur les autres solveurs
+    publish_rescore(challenge_id, result.rescore, exclude=user_id)
+    
+    # Diffusion aux clients connectés au flux SSE (retenue pendant un gel)
+    scoreboard_freeze.publish('solve', {
+        'user_id': user_id,
+        'challenge_id': challenge_id,
+        'points': result.points
+    })
+    entry = leaderboard.rank(user_id)
+    if entry:
+        scoreboard_freeze.publish('score', {
+            'user_id': user_id,
+            'username': entry['username'],
+            'score': result.score,
+            'solved_challenges': entry['solved_challenges'],
+            'rank': entry['rank']
+        })
+    if result.team_id is not None:
+        scoreboard_freeze.publish('team_score', {'team_id': result.team_id, 'score': result.team_score})
+    
+    return jsonify({
+        'message': 'Correct flag!',
+        'points_earned': result.points
+    }), 200
 
 @challenges_bp.route('/categories', methods=['GET'])
 @jwt_required()
 def get_categories():
-    categories = db.session.query(Challenge.category).distinct().all()
-    return jsonify({
-        'categories': [category[0] for category in categories]
-    }), 200
+    version = catalog.version()
+    response = jsonify({
+        'categories': list(catalog.distinct('category'))
+    })
+    response.set_etag(catalog.etag(version, 'categories'))
+    return response.make_conditional(request)
 
 @challenges_bp.route('/difficulties', methods=['GET'])
 @jwt_required()
 def get_difficulties():
-    difficulties = db.session.query(Challenge.difficulty).distinct().all()
-    return jsonify({
-        'difficulties': [difficulty[0] for difficulty in difficulties]
-    }), 200 
\ No newline at end of file
+    version = catalog.version()
+    response = jsonify({
+        'difficulties': list(catalog.distinct('difficulty'))
+    })
+    response.set_etag(catalog.etag(version, 'difficulties'))
+    return response.make_conditional(request)
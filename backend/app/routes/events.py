@@ -0,0 +1,63 @@
+from flask import Blueprint, Response, request, current_app, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..events import events
+import queue
+import time
+
+events_bp = Blueprint('events', __name__)
+
+def _stream_unavailable():
+    # Le client se rabat sur un rechargement périodique
+    return jsonify({'error': 'Event stream unavailable'}), 503
+
+
+@events_bp.route('/ticket', methods=['POST'])
+@jwt_required()
+def ticket():
+    if not current_app.config['EVENTS_STREAM_ENABLED']:
+        return _stream_unavailable()
+    return jsonify({
+        'ticket': events.issue_ticket(get_jwt_identity()),
+        'expires_in': current_app.config['EVENTS_TICKET_MAX_AGE']
+    })
+
+
+# EventSource ne permet pas d'envoyer d'en-tête Authorization : le flux
+# s'authentifie par un ticket de courte durée (?ticket=...), jamais par le
+# token d'accès
+@events_bp.route('/stream', methods=['GET'])
+def stream():
+    if not current_app.config['EVENTS_STREAM_ENABLED']:
+        return _stream_unavailable()
+    if events.read_ticket(request.args.get('ticket', '')) is None:
+        return jsonify({'error': 'Invalid or expired stream ticket'}), 401
+
+    heartbeat = current_app.config['EVENTS_HEARTBEAT']
+    max_duration = current_app.config['EVENTS_MAX_DURATION']
+    # Nouvelle connexion ouverte par le client (nouveau ticket) : l'en-tête
+    # Last-Event-ID n'est pas renvoyé, il passe dans la query string
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription = events.subscribe(current_app.config['EVENTS_QUEUE_SIZE'], last_event_id)
+
+    def generate():
+        deadline = time.monotonic() + max_duration
+        try:
+            yield f"retry: {heartbeat * 1000}\n\n"
+            while time.monotonic() < deadline:
+                try:
+                    event = subscription.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event is None:
+                    # Client trop lent : il doit recharger l'état complet
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                yield events.format(event)
+        finally:
+            events.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
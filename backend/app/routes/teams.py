@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import selectinload
 from ..models import db, Team, User, team_members
+from ..scoring import credit_team_member, team_ranking
+from ..history import score_history
+from ..freeze import scoreboard_freeze
 
 teams_bp = Blueprint('teams', __name__)
 
-@teams_bp.route('/api/teams', methods=['POST'])
+@teams_bp.route('/teams', methods=['POST'])
 @jwt_required()
 def create_team():
     user_id = get_jwt_identity()
@@ -34,7 +38,10 @@ def create_team():
 
         # Add the creator as the first member
         user.teams.append(new_team)
+        db.session.flush()
+        credit_team_member(new_team.id, user.id)
         db.session.commit()
+        score_history.record('team', new_team.id, new_team.score)
 
         return jsonify({
             'id': new_team.id,
@@ -50,7 +57,7 @@ def create_team():
         return jsonify({'error': 'An error occurred while creating the team'}), 500
 
 # Route to get a specific team's details
-@teams_bp.route('/api/teams/<int:team_id>', methods=['GET'])
+@teams_bp.route('/teams/<int:team_id>', methods=['GET'])
 @jwt_required()
 def get_team(team_id):
     team = Team.query.get(team_id)
@@ -60,28 +67,106 @@ def get_team(team_id):
     return jsonify({
         'id': team.id,
         'name': team.name,
-        'score': team.score,
+        'score': scoreboard_freeze.team_score(team.id, team.score),
         'created_at': team.created_at.isoformat(),
         'members': [{'id': member.id, 'username': member.username} for member in team.members]
     }), 200
 
-# Route to get all teams
-@teams_bp.route('/api/teams/', methods=['GET'])
+# Route to get the team leaderboard, read from the materialized Team.score
+@teams_bp.route('/teams/leaderboard', methods=['GET'])
 @jwt_required()
-def get_all_teams():
-    teams = Team.query.all()
+def get_team_leaderboard():
+    limit = min(request.args.get('limit', default=10, type=int), 100)
+    offset = max(request.args.get('offset', default=0, type=int), 0)
+
+    # Pendant un gel, classement servi depuis l'instantané en mémoire
+    frozen = scoreboard_freeze.current()
+    if frozen:
+        rows = list(frozen.teams[offset:offset + limit])
+    else:
+        rows = team_ranking(offset, limit)
+
+    return jsonify({
+        'leaderboard': rows,
+        'frozen_at': frozen.frozen_at.isoformat() if frozen else None
+    }), 200
+
+@teams_bp.route('/teams/leaderboard/history', methods=['GET'])
+@jwt_required()
+def get_team_leaderboard_history():
+    top = min(request.args.get('top', default=10, type=int), 50)
+    try:
+        start, end, points = score_history.window(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    frozen = scoreboard_freeze.current()
+    if frozen:
+        start, end = frozen.frozen_at - (end - start), frozen.frozen_at
+        teams = frozen.teams[:top]
+    else:
+        teams = team_ranking(limit=top)
+    series = score_history.series('team', [team['id'] for team in teams], start, end, points)
+
     return jsonify({
-        'teams': [{
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': [{
+            'id': team['id'],
+            'name': team['name'],
+            'score': team['score'],
+            'points': score_history.points(series[team['id']])
+        } for team in teams]
+    }), 200
+
+# Route to get all teams, paginated by id
+TEAM_FIELDS = ('id', 'name', 'score', 'created_at', 'member_count', 'members')
+
+@teams_bp.route('/teams/', methods=['GET'])
+@jwt_required()
+def get_all_teams():
+    limit = min(max(request.args.get('limit', default=50, type=int), 1), 100)
+    cursor = request.args.get('cursor', type=int)
+    fields = request.args.get('fields')
+    fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else list(TEAM_FIELDS)
+    unknown = [f for f in fields if f not in TEAM_FIELDS]
+    if unknown or not fields:
+        return jsonify({
+            'error': f"Unknown fields: {', '.join(unknown)}; expected some of: {', '.join(TEAM_FIELDS)}"
+        }), 400
+
+    member_count = db.select(db.func.count(team_members.c.user_id)) \
+        .where(team_members.c.team_id == Team.id) \
+        .scalar_subquery()
+    query = db.session.query(Team, member_count).order_by(Team.id)
+    if cursor is not None:
+        query = query.filter(Team.id > cursor)
+    if 'members' in fields:
+        # One extra query for all members instead of one per team
+        query = query.options(selectinload(Team.members).load_only(User.id, User.username))
+    rows = query.limit(limit).all()
+    # Pendant un gel, scores de l'instantané
+    frozen = scoreboard_freeze.current()
+
+    def serialize(team, count):
+        values = {
             'id': team.id,
             'name': team.name,
-            'score': team.score,
+            'score': scoreboard_freeze.team_score(team.id, team.score, frozen),
             'created_at': team.created_at.isoformat(),
-             'members': [{'id': member.id, 'username': member.username} for member in team.members]
-        } for team in teams]
+            'member_count': count
+        }
+        if 'members' in fields:
+            values['members'] = [{'id': member.id, 'username': member.username} for member in team.members]
+        return {field: values[field] for field in fields}
+
+    return jsonify({
+        'teams': [serialize(team, count) for team, count in rows],
+        'next_cursor': rows[-1][0].id if len(rows) == limit else None
     }), 200
 
 # Route to join a team
-@teams_bp.route('/api/teams/<int:team_id>/join', methods=['POST'])
+@teams_bp.route('/teams/<int:team_id>/join', methods=['POST'])
 @jwt_required()
 def join_team(team_id):
     user_id = get_jwt_identity()
@@ -103,7 +188,11 @@ def join_team(team_id):
 
     try:
         team.members.append(user)
+        db.session.flush()
+        # The team gets credit for challenges the new member already solved
+        credit_team_member(team.id, user.id)
         db.session.commit()
+        score_history.record('team', team.id, team.score)
         return jsonify({'message': f'Successfully joined team {team.name}'}), 200
     except Exception as e:
         db.session.rollback()
@@ -1,49 +1,107 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import User, SolvedChallenge, Challenge, db
-from datetime import datetime
+from ..models import User, db
+from ..leaderboard import leaderboard
+from ..stats import user_stats
+from ..identity import identities
+from ..history import score_history
+from ..freeze import scoreboard_freeze
+from datetime import datetime, timezone
+import math
 
 users_bp = Blueprint('users', __name__)
 
+def _leaderboard_entry(entry):
+    last_solve = entry['last_solve']
+    return {
+        'id': entry['id'],
+        'username': entry['username'],
+        'score': entry['score'],
+        'solved_challenges': entry['solved_challenges'],
+        'rank': entry['rank'],
+        'last_solve_at': None if math.isinf(last_solve) else
+            datetime.fromtimestamp(last_solve, timezone.utc).replace(tzinfo=None).isoformat()
+    }
+
 @users_bp.route('/leaderboard', methods=['GET'])
 @jwt_required()
 def get_leaderboard():
-    # Récupération des paramètres de filtrage
-    limit = request.args.get('limit', default=10, type=int)
+    # Récupération des paramètres de pagination
+    limit = min(request.args.get('limit', default=10, type=int), 100)
+    offset = request.args.get('offset', default=0, type=int)
+    cursor = request.args.get('cursor')
+    
+    # Lecture du classement en mémoire, sans requête SQL ; pendant un gel,
+    # l'instantané pris au moment du gel
+    frozen = scoreboard_freeze.current()
+    index = frozen.users if frozen else leaderboard
+    if cursor:
+        try:
+            entries = index.after(cursor, limit)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    else:
+        entries = index.slice(offset, limit)
     
-    # Récupération des utilisateurs triés par score
-    users = User.query.order_by(User.score.desc()).limit(limit).all()
+    next_cursor = None
+    if len(entries) == limit and entries:
+        next_cursor = index.encode_cursor(entries[-1])
     
     return jsonify({
-        'leaderboard': [{
-            'id': user.id,
-            'username': user.username,
-            'score': user.score,
-            'solved_challenges': len(user.solved_challenges)
-        } for user in users]
+        'leaderboard': [_leaderboard_entry(entry) for entry in entries],
+        'total': len(index),
+        'next_cursor': next_cursor,
+        'frozen_at': frozen.frozen_at.isoformat() if frozen else None
+    }), 200
+
+@users_bp.route('/leaderboard/history', methods=['GET'])
+@jwt_required()
+def get_leaderboard_history():
+    # Top N lu dans le classement en mémoire, puis une seule requête
+    # pour les séries réduites de ces utilisateurs
+    top = min(request.args.get('top', default=10, type=int), 50)
+    try:
+        start, end, points = score_history.window(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Gel : séries arrêtées à la date du gel
+    frozen = scoreboard_freeze.current()
+    if frozen:
+        start, end = frozen.frozen_at - (end - start), frozen.frozen_at
+    entries = (frozen.users if frozen else leaderboard).top(top)
+    series = score_history.series('user', [entry['id'] for entry in entries], start, end, points)
+    
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': [{
+            'id': entry['id'],
+            'username': entry['username'],
+            'score': entry['score'],
+            'points': score_history.points(series[entry['id']])
+        } for entry in entries]
     }), 200
 
+@users_bp.route('/<int:user_id>/rank', methods=['GET'])
+@jwt_required()
+def get_user_rank(user_id):
+    frozen = scoreboard_freeze.current()
+    index = frozen.users if frozen else leaderboard
+    entry = index.rank(user_id)
+    if entry is None:
+        return jsonify({'error': 'User not found'}), 404
+    
+    return jsonify(dict(_leaderboard_entry(entry), total=len(index))), 200
+
 @users_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     user_id = get_jwt_identity()
     user = User.query.get_or_404(user_id)
     
-    # Récupération des challenges résolus
-    solved_challenges = SolvedChallenge.query.filter_by(user_id=user_id).all()
-    challenges_info = []
-    
-    for solved in solved_challenges:
-        challenge = Challenge.query.get(solved.challenge_id)
-        if challenge:
-            challenges_info.append({
-                'id': challenge.id,
-                'title': challenge.title,
-                'category': challenge.category,
-                'difficulty': challenge.difficulty,
-                'points': challenge.points,
-                'solved_at': solved.solved_at.isoformat()
-            })
+    # Récupération des challenges résolus (une requête jointe, en cache)
+    stats = user_stats.get(user.id)
     
     return jsonify({
         'id': user.id,
@@ -51,7 +109,7 @@ def get_profile():
         'email': user.email,
         'score': user.score,
         'created_at': user.created_at.isoformat(),
-        'solved_challenges': challenges_info
+        'solved_challenges': stats['solved_challenges']
     }), 200
 
 @users_bp.route('/profile', methods=['PUT'])
@@ -73,6 +131,7 @@ def update_profile():
         user.email = data['email']
     
     db.session.commit()
+    identities.invalidate(user.id)
     
     return jsonify({
         'message': 'Profile updated successfully',
@@ -89,29 +148,12 @@ def get_user_stats():
     user_id = get_jwt_identity()
     user = User.query.get_or_404(user_id)
     
-    # Statistiques par catégorie
-    solved_by_category = {}
-    for solved in user.solved_challenges:
-        challenge = Challenge.query.get(solved.challenge_id)
-        if challenge:
-            category = challenge.category
-            if category not in solved_by_category:
-                solved_by_category[category] = 0
-            solved_by_category[category] += 1
-    
-    # Statistiques par difficulté
-    solved_by_difficulty = {}
-    for solved in user.solved_challenges:
-        challenge = Challenge.query.get(solved.challenge_id)
-        if challenge:
-            difficulty = challenge.difficulty
-            if difficulty not in solved_by_difficulty:
-                solved_by_difficulty[difficulty] = 0
-            solved_by_difficulty[difficulty] += 1
+    # Statistiques par catégorie et par difficulté
+    stats = user_stats.get(user.id)
     
     return jsonify({
         'total_score': user.score,
-        'total_solved': len(user.solved_challenges),
-        'solved_by_category': solved_by_category,
-        'solved_by_difficulty': solved_by_difficulty
-    }), 200 
\ No newline at end of file
+        'total_solved': stats['total_solved'],
+        'solved_by_category': stats['solved_by_category'],
+        'solved_by_difficulty': stats['solved_by_difficulty']
+    }), 200
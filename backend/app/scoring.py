@@ -0,0 +1,499 @@
+import math
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import exists, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from .models import db, User, Challenge, SolvedChallenge, Team, TeamSolve, team_members
+from .catalog import catalog
+from .events import events
+from .flags import flag_cache
+from .leaderboard import leaderboard
+from .stats import user_stats
+from .history import score_history
+
+SolveResult = namedtuple('SolveResult', ['score', 'solved_at', 'team_id', 'team_score', 'points', 'rescore'])
+Rescore = namedtuple('Rescore', ['value', 'delta', 'users', 'teams'])
+
+SCORING_MODES = ('static', 'linear', 'logarithmic')
+
+
+class UnknownUser(Exception):
+    pass
+
+
+def challenge_value(scoring, initial, minimum, decay, solves):
+    """Valeur d'un challenge dynamique après `solves` résolutions.
+
+    linear      : la valeur perd `decay` points par résolution ;
+    logarithmic : décroissance parabolique qui atteint `minimum` à la
+                  `decay`-ième résolution (formule de CTFd).
+    Le premier solveur obtient la valeur initiale ; la valeur ne descend
+    jamais sous `minimum`.
+    """
+    minimum = minimum or 0
+    decay = decay or 0
+    solves = max(solves - 1, 0)
+    if scoring == 'linear':
+        value = initial - decay * solves
+    elif decay:
+        value = math.ceil((minimum - initial) / decay ** 2 * solves ** 2 + initial)
+    else:
+        value = initial
+    return max(int(value), minimum)
+
+
+def validate_scoring(scoring, initial, minimum, decay):
+    """Message d'erreur si les paramètres de score sont invalides, sinon None."""
+    if scoring not in SCORING_MODES:
+        return f"Invalid scoring, expected one of: {', '.join(SCORING_MODES)}"
+    if scoring == 'static':
+        return None
+    if initial is None or initial < 0:
+        return 'initial_points is required for dynamic scoring'
+    if minimum is not None and not 0 <= minimum <= initial:
+        return 'minimum_points must be between 0 and initial_points'
+    if decay is None or decay < 0:
+        return 'decay must be a positive integer'
+    return None
+
+
+def _ignore_conflicts(dialect, table, index_elements):
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    return insert(table)
+
+
+def _increment(table, row_id, points):
+    return update(table) \
+        .where(table.c.id == row_id) \
+        .values(score=db.func.coalesce(table.c.score, 0) + points)
+
+
+def _insert_solve(dialect, user_id, challenge_id, points, solved_at):
+    """Insère la résolution et crédite l'utilisateur et son équipe.
+
+    Ne valide pas la transaction ; renvoie None (après rollback) si le
+    challenge était déjà résolu. `points` peut être une expression SQL.
+    """
+    users = User.__table__
+    teams = Team.__table__
+    solved = SolvedChallenge.__table__
+    team_solves = TeamSolve.__table__
+
+    stmt = _ignore_conflicts(dialect, solved, ['user_id', 'challenge_id']) \
+        .values(user_id=user_id, challenge_id=challenge_id, solved_at=solved_at)
+    if dialect in ('postgresql', 'sqlite'):
+        # ON CONFLICT DO NOTHING : un doublon n'insère simplement rien
+        inserted = db.session.execute(stmt).rowcount
+    else:
+        # Sans ON CONFLICT, le doublon lève IntegrityError (voir record_solve)
+        with db.session.begin_nested():
+            inserted = db.session.execute(stmt).rowcount
+    if inserted == 0:
+        db.session.rollback()
+        return None
+
+    if db.session.execute(_increment(users, user_id, points)).rowcount == 0:
+        db.session.rollback()
+        raise UnknownUser(user_id)
+    score = db.session.execute(select(users.c.score).where(users.c.id == user_id)).scalar()
+
+    team_id = db.session.execute(
+        select(team_members.c.team_id).where(team_members.c.user_id == user_id)
+    ).scalar()
+    team_score = None
+    if team_id is not None:
+        # Deux coéquipiers peuvent résoudre le challenge en même temps : le
+        # second n'insère rien et l'équipe n'est créditée qu'une fois
+        stmt = _ignore_conflicts(dialect, team_solves, ['team_id', 'challenge_id']).from_select(
+            ['team_id', 'challenge_id', 'solved_at'],
+            select(literal(team_id), literal(challenge_id), literal(solved_at)).where(
+                ~exists().where(team_solves.c.team_id == team_id)
+                .where(team_solves.c.challenge_id == challenge_id)
+            )
+        )
+        if dialect in ('postgresql', 'sqlite'):
+            inserted = db.session.execute(stmt).rowcount
+        else:
+            try:
+                with db.session.begin_nested():
+                    inserted = db.session.execute(stmt).rowcount
+            except IntegrityError:
+                inserted = 0
+        if inserted:
+            db.session.execute(_increment(teams, team_id, points))
+            team_score = db.session.execute(select(teams.c.score).where(teams.c.id == team_id)).scalar()
+        else:
+            team_id = None
+    return SolveResult(score, solved_at, team_id, team_score, points, None)
+
+
+def record_solve(user_id, challenge_id, dynamic=False):
+    """Enregistre un flag validé et crédite les points de façon atomique.
+
+    Renvoie un SolveResult, ou None si le challenge était déjà résolu.
+    Les points crédités sont la valeur courante du challenge, lue en base
+    et non dans un cache, comme dans `credit_point_changes` et
+    `reconcile_team_scores`. Les scores sont incrémentés côté base
+    (score = score + points) : deux
+    soumissions simultanées ne peuvent ni créditer deux fois le challenge
+    ni perdre une mise à jour. Si l'utilisateur a une équipe, celle-ci est
+    créditée dans la même transaction, une seule fois par challenge.
+
+    Pour un challenge dynamique, la ligne du challenge est verrouillée, le
+    solveur est crédité de la valeur lue en base et la nouvelle valeur est
+    reportée sur tous les solveurs dans la même transaction (`rescore`).
+    """
+    dialect = db.engine.dialect.name
+    users = User.__table__
+    teams = Team.__table__
+    solved = SolvedChallenge.__table__
+    team_solves = TeamSolve.__table__
+    solved_at = datetime.utcnow()
+    points = select(Challenge.points).where(Challenge.id == challenge_id).scalar_subquery()
+
+    try:
+        if dynamic:
+            return _record_dynamic_solve(dialect, user_id, challenge_id, solved_at)
+
+        if dialect == 'postgresql':
+            # Un seul aller-retour : chaque INSERT ... ON CONFLICT DO NOTHING
+            # est une CTE et les UPDATE ne portent que sur les lignes
+            # effectivement insérées.
+            inserted = _ignore_conflicts(dialect, solved, ['user_id', 'challenge_id']) \
+                .values(user_id=user_id, challenge_id=challenge_id, solved_at=solved_at) \
+                .returning(solved.c.solved_at) \
+                .cte('inserted')
+            team_inserted = _ignore_conflicts(dialect, team_solves, ['team_id', 'challenge_id']) \
+                .from_select(
+                    ['team_id', 'challenge_id', 'solved_at'],
+                    select(team_members.c.team_id, literal(challenge_id), inserted.c.solved_at)
+                    .where(team_members.c.user_id == user_id)
+                ) \
+                .returning(team_solves.c.team_id) \
+                .cte('team_inserted')
+            team_updated = update(teams) \
+                .where(teams.c.id == team_inserted.c.team_id) \
+                .values(score=db.func.coalesce(teams.c.score, 0) + points) \
+                .returning(teams.c.id, teams.c.score) \
+                .cte('team_updated')
+            stmt = _increment(users, user_id, points) \
+                .where(inserted.c.solved_at.isnot(None)) \
+                .returning(
+                    users.c.score,
+                    inserted.c.solved_at,
+                    select(team_updated.c.id).scalar_subquery(),
+                    select(team_updated.c.score).scalar_subquery(),
+                    points
+                )
+            row = db.session.execute(stmt).first()
+            if row is None:
+                db.session.rollback()
+                return None
+            db.session.commit()
+            return SolveResult(*row, None)
+
+        result = _insert_solve(dialect, user_id, challenge_id, points, solved_at)
+        if result is None:
+            return None
+        credited = db.session.execute(select(Challenge.points).where(Challenge.id == challenge_id)).scalar()
+        db.session.commit()
+        return result._replace(points=credited)
+    except IntegrityError as e:
+        db.session.rollback()
+        if _is_user_fk_violation(e):
+            raise UnknownUser(user_id)
+        if dialect in ('postgresql', 'sqlite'):
+            # Les doublons sont absorbés par ON CONFLICT DO NOTHING
+            raise
+        return None
+
+
+def _is_user_fk_violation(error):
+    """Vrai si l'IntegrityError vient de la clé étrangère user_id.
+
+    PostgreSQL nomme la contrainte et la colonne (code 23503) ; SQLite ne
+    précise pas la colonne, toute violation de clé étrangère compte.
+    """
+    message = str(error.orig)
+    code = getattr(error.orig, 'pgcode', None)
+    if code is not None:
+        return code == '23503' and 'user_id' in message
+    return 'FOREIGN KEY constraint failed' in message
+
+
+def _lock_challenge(challenge_id):
+    # SELECT ... FOR UPDATE sur PostgreSQL ; SQLite sérialise déjà les
+    # transactions à partir de leur première écriture
+    db.session.execute(select(Challenge.id).where(Challenge.id == challenge_id).with_for_update())
+
+
+def _record_dynamic_solve(dialect, user_id, challenge_id, solved_at):
+    _lock_challenge(challenge_id)
+    # Valeur lue au moment de l'écriture, jamais celle d'un cache
+    current = select(Challenge.points).where(Challenge.id == challenge_id).scalar_subquery()
+    result = _insert_solve(dialect, user_id, challenge_id, current, solved_at)
+    if result is None:
+        return None
+    rescore = _revalue(challenge_id)
+
+    users = User.__table__
+    teams = Team.__table__
+    score = db.session.execute(select(users.c.score).where(users.c.id == user_id)).scalar()
+    team_score = result.team_score
+    if result.team_id is not None:
+        team_score = db.session.execute(select(teams.c.score).where(teams.c.id == result.team_id)).scalar()
+    points = db.session.execute(select(Challenge.points).where(Challenge.id == challenge_id)).scalar()
+    db.session.commit()
+    return result._replace(score=score, team_score=team_score, points=points, rescore=rescore)
+
+
+def _revalue(challenge_id):
+    """Recalcule la valeur d'un challenge dynamique et reporte l'écart.
+
+    Un seul UPDATE par table, limité aux solveurs du challenge et à leurs
+    équipes (score = score + écart), au lieu d'un recalcul complet. Ne
+    valide pas la transaction ; la ligne du challenge doit être
+    verrouillée. users et teams ({id: nouveau score}) valent None si la
+    base ne sait pas renvoyer les lignes modifiées.
+    """
+    challenges = Challenge.__table__
+    users = User.__table__
+    teams = Team.__table__
+    solved = SolvedChallenge.__table__
+    team_solves = TeamSolve.__table__
+
+    row = db.session.execute(select(
+        challenges.c.points, challenges.c.scoring, challenges.c.initial_points,
+        challenges.c.minimum_points, challenges.c.decay
+    ).where(challenges.c.id == challenge_id)).first()
+    if row is None or row.scoring == 'static':
+        return None
+
+    solves = db.session.execute(
+        select(db.func.count()).select_from(solved).where(solved.c.challenge_id == challenge_id)
+    ).scalar()
+    initial = row.initial_points if row.initial_points is not None else row.points
+    value = challenge_value(row.scoring, initial, row.minimum_points, row.decay, solves)
+    delta = value - row.points
+    if not delta:
+        return Rescore(value, 0, {}, {})
+
+    db.session.execute(update(challenges).where(challenges.c.id == challenge_id).values(points=value))
+    user_stmt = update(users) \
+        .where(users.c.id.in_(select(solved.c.user_id).where(solved.c.challenge_id == challenge_id))) \
+        .values(score=db.func.coalesce(users.c.score, 0) + delta)
+    team_stmt = update(teams) \
+        .where(teams.c.id.in_(select(team_solves.c.team_id).where(team_solves.c.challenge_id == challenge_id))) \
+        .values(score=db.func.coalesce(teams.c.score, 0) + delta)
+    if db.engine.dialect.update_returning:
+        user_scores = dict(db.session.execute(user_stmt.returning(users.c.id, users.c.score)).all())
+        team_scores = dict(db.session.execute(team_stmt.returning(teams.c.id, teams.c.score)).all())
+    else:
+        db.session.execute(user_stmt)
+        db.session.execute(team_stmt)
+        user_scores = team_scores = None
+    return Rescore(value, delta, user_scores, team_scores)
+
+
+def revalue_challenges(challenge_ids):
+    """Version groupée de `_revalue` pour plusieurs challenges dynamiques.
+
+    Un UPDATE par table quelle que soit la taille du lot (voir
+    `credit_point_changes`). Ne valide pas la transaction. Renvoie
+    ({challenge: Rescore}, scores utilisateurs, scores d'équipes) ; les
+    Rescore ne portent pas de scores.
+    """
+    challenges = Challenge.__table__
+    solved = SolvedChallenge.__table__
+    challenge_ids = sorted(set(challenge_ids))
+    if not challenge_ids:
+        return {}, {}, {}
+
+    db.session.execute(select(challenges.c.id).where(challenges.c.id.in_(challenge_ids)).with_for_update())
+    solves = dict(db.session.execute(
+        select(solved.c.challenge_id, db.func.count())
+        .where(solved.c.challenge_id.in_(challenge_ids))
+        .group_by(solved.c.challenge_id)
+    ).all())
+    rescores = {}
+    for row in db.session.execute(select(
+        challenges.c.id, challenges.c.points, challenges.c.scoring, challenges.c.initial_points,
+        challenges.c.minimum_points, challenges.c.decay
+    ).where(challenges.c.id.in_(challenge_ids)).where(challenges.c.scoring != 'static')):
+        initial = row.initial_points if row.initial_points is not None else row.points
+        value = challenge_value(row.scoring, initial, row.minimum_points, row.decay, solves.get(row.id, 0))
+        rescores[row.id] = Rescore(value, value - row.points, None, None)
+
+    deltas = {challenge_id: rescore.delta for challenge_id, rescore in rescores.items() if rescore.delta}
+    if deltas:
+        db.session.execute(update(Challenge), [
+            {'id': challenge_id, 'points': rescores[challenge_id].value} for challenge_id in deltas
+        ])
+    return (rescores,) + credit_point_changes(deltas)
+
+
+def reprice_challenges(changes):
+    """Valeur fixe modifiée par un administrateur : {challenge: (ancienne, nouvelle)}.
+
+    Les solveurs et leurs équipes sont crédités de l'écart, comme pour un
+    challenge dynamique. Ne valide pas la transaction ; renvoie les
+    arguments de `publish_revalued`.
+    """
+    rescores = {challenge_id: Rescore(new, new - old, None, None)
+                for challenge_id, (old, new) in changes.items() if new != old}
+    deltas = {challenge_id: rescore.delta for challenge_id, rescore in rescores.items()}
+    return (rescores,) + credit_point_changes(deltas)
+
+
+def credit_point_changes(deltas):
+    """Reporte des changements de valeur ({challenge: écart}) sur les scores.
+
+    Les scores matérialisés valent la somme des valeurs courantes des
+    challenges résolus, ce que recalcule `reconcile_team_scores` : chaque
+    changement de valeur est donc ajouté aux solveurs et à leurs équipes.
+    Un UPDATE par table, l'écart d'un solveur étant la somme des écarts
+    des challenges qu'il a résolus. Ne valide pas la transaction. Renvoie
+    ({utilisateur: score}, {équipe: score}), ou None pour chacun si la base
+    ne sait pas renvoyer les lignes modifiées.
+    """
+    users = User.__table__
+    teams = Team.__table__
+    solved = SolvedChallenge.__table__
+    team_solves = TeamSolve.__table__
+    if not deltas:
+        return {}, {}
+    challenge_ids = list(deltas)
+
+    def credit(table, solves_table, owner):
+        delta = select(db.func.sum(db.case(deltas, value=solves_table.c.challenge_id))) \
+            .where(owner == table.c.id) \
+            .where(solves_table.c.challenge_id.in_(challenge_ids)) \
+            .scalar_subquery()
+        return update(table) \
+            .where(table.c.id.in_(select(owner).where(solves_table.c.challenge_id.in_(challenge_ids)))) \
+            .values(score=db.func.coalesce(table.c.score, 0) + delta)
+
+    user_stmt = credit(users, solved, solved.c.user_id)
+    team_stmt = credit(teams, team_solves, team_solves.c.team_id)
+    if db.engine.dialect.update_returning:
+        user_scores = dict(db.session.execute(user_stmt.returning(users.c.id, users.c.score)).all())
+        team_scores = dict(db.session.execute(team_stmt.returning(teams.c.id, teams.c.score)).all())
+    else:
+        db.session.execute(user_stmt)
+        db.session.execute(team_stmt)
+        user_scores = team_scores = None
+    return user_scores, team_scores
+
+
+def publish_revalued(rescores, user_scores, team_scores):
+    """Équivalent de `publish_rescore` pour `revalue_challenges`.
+
+    N'incrémente pas la version du catalogue : l'appelant, qui a modifié
+    les challenges, le fait une seule fois.
+    """
+    changed = {challenge_id: rescore for challenge_id, rescore in rescores.items() if rescore.delta}
+    if not changed:
+        return
+    # Plusieurs écarts par solveur : reconstruction plutôt que mise à jour
+    leaderboard.invalidate()
+    if user_scores is not None:
+        for user_id, score in user_scores.items():
+            user_stats.invalidate(user_id)
+            score_history.record('user', user_id, score)
+        for team_id, score in team_scores.items():
+            score_history.record('team', team_id, score)
+    for challenge_id, rescore in changed.items():
+        flag_cache.invalidate(challenge_id)
+        events.publish('rescore', {'challenge_id': challenge_id, 'points': rescore.value, 'delta': rescore.delta})
+
+
+def publish_rescore(challenge_id, rescore, exclude=None):
+    """Reporte un changement de valeur dans les caches et prévient les clients.
+
+    `exclude` est le solveur déjà mis à jour par l'appelant.
+    """
+    if rescore is None or not rescore.delta:
+        return
+    if rescore.users is None:
+        leaderboard.invalidate()
+    else:
+        user_ids = [user_id for user_id in rescore.users if user_id != exclude]
+        leaderboard.apply_delta(user_ids, rescore.delta)
+        for user_id in user_ids:
+            user_stats.invalidate(user_id)
+            score_history.record('user', user_id, rescore.users[user_id])
+        for team_id, score in rescore.teams.items():
+            score_history.record('team', team_id, score)
+    flag_cache.invalidate(challenge_id)
+    catalog.bump()
+    events.publish('rescore', {'challenge_id': challenge_id, 'points': rescore.value, 'delta': rescore.delta})
+
+
+def _team_score(team_id):
+    return select(db.func.coalesce(db.func.sum(Challenge.points), 0)) \
+        .select_from(TeamSolve.__table__.join(Challenge.__table__, Challenge.id == TeamSolve.challenge_id)) \
+        .where(TeamSolve.team_id == team_id) \
+        .scalar_subquery()
+
+
+def credit_team_member(team_id, user_id):
+    """Reporte sur l'équipe les challenges déjà résolus par un nouveau membre.
+
+    Ne valide pas la transaction : à appeler avec l'ajout du membre.
+    """
+    team_solves = TeamSolve.__table__
+    solved = SolvedChallenge.__table__
+    teams = Team.__table__
+
+    # Score recalculé sur les valeurs courantes, comme reconcile_team_scores
+    # et le crédit incrémental (credit_point_changes)
+    dialect = db.engine.dialect.name
+    db.session.execute(_ignore_conflicts(dialect, team_solves, ['team_id', 'challenge_id']).from_select(
+        ['team_id', 'challenge_id', 'solved_at'],
+        select(literal(team_id), solved.c.challenge_id, solved.c.solved_at)
+        .where(solved.c.user_id == user_id)
+        .where(~exists().where(team_solves.c.team_id == team_id)
+               .where(team_solves.c.challenge_id == solved.c.challenge_id))
+    ))
+    db.session.execute(update(teams).where(teams.c.id == team_id).values(score=_team_score(team_id)))
+
+
+def reconcile_team_scores():
+    """Reconstruit team_solves et tous les scores d'équipe en bloc."""
+    team_solves = TeamSolve.__table__
+    solved = SolvedChallenge.__table__
+    teams = Team.__table__
+
+    db.session.execute(team_solves.delete())
+    db.session.execute(insert(team_solves).from_select(
+        ['team_id', 'challenge_id', 'solved_at'],
+        select(team_members.c.team_id, solved.c.challenge_id, db.func.min(solved.c.solved_at))
+        .select_from(solved.join(team_members, team_members.c.user_id == solved.c.user_id))
+        .group_by(team_members.c.team_id, solved.c.challenge_id)
+    ))
+    result = db.session.execute(update(teams).values(score=_team_score(teams.c.id)))
+    db.session.commit()
+    return result.rowcount
+
+
+def team_ranking(offset=0, limit=None):
+    """Classement des équipes (score matérialisé), avec le nombre de membres."""
+    member_count = select(db.func.count(team_members.c.user_id)) \
+        .where(team_members.c.team_id == Team.id) \
+        .scalar_subquery()
+    rows = db.session.query(Team.id, Team.name, Team.score, member_count) \
+        .order_by(Team.score.desc(), Team.id) \
+        .offset(offset).limit(limit).all()
+    return [{
+        'id': team_id,
+        'name': name,
+        'score': score or 0,
+        'members': members,
+        'rank': offset + position + 1
+    } for position, (team_id, name, score, members) in enumerate(rows)]
@@ -0,0 +1,117 @@
+import os
+
+from flask import current_app
+
+from .models import db, User, Challenge
+from .artifacts import artifacts
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+# Révision du schéma d'origine, que créait db.create_all()
+BASELINE_REVISION = '3f2a9c1d0b01'
+
+DEFAULT_ADMIN = {
+    'username': 'test',
+    'email': 'test@example.com',
+    'password': 'password123',
+}
+
+DEFAULT_CHALLENGES = [
+    {
+        'title': "WiFi Sniffing 101",
+        'description': "Capturez et analysez le trafic WiFi pour trouver le flag caché.",
+        'category': "Wireless",
+        'difficulty': "Easy",
+        'points': 100,
+        'flag': "FLAG{WIFI_SNIFFING_BASICS}",
+    },
+    {
+        'title': "IoT Device Analysis",
+        'description': "Analysez le firmware d'un appareil IoT pour trouver des vulnérabilités.",
+        'category': "IoT",
+        'difficulty': "Medium",
+        'points': 200,
+        'flag': "FLAG{IOT_SECURITY_101}",
+    },
+    {
+        'title': "Bluetooth Security",
+        'description': "Trouvez la vulnérabilité dans la communication Bluetooth.",
+        'category': "Wireless",
+        'difficulty': "Hard",
+        'points': 300,
+        'flag': "FLAG{BLUETOOTH_HACK}",
+    },
+    {
+        'title': "RF Signal Analysis",
+        'description': "Analysez le signal RF pour décoder le message secret.",
+        'category': "RF",
+        'difficulty': "Medium",
+        'points': 250,
+        'flag': "FLAG{RF_ANALYSIS}",
+    },
+]
+
+# Identifiant arbitraire du verrou PostgreSQL qui sérialise l'initialisation
+BOOTSTRAP_LOCK_ID = 724001
+
+
+def _lock(connection):
+    # Deux conteneurs lancés en même temps ne doivent pas créer le schéma
+    # ni insérer les données deux fois : verrou de transaction côté
+    # PostgreSQL, SQLite sérialisant déjà les écritures.
+    if db.engine.dialect.name == 'postgresql':
+        connection.execute(db.text('SELECT pg_advisory_xact_lock(:id)'), {'id': BOOTSTRAP_LOCK_ID})
+
+
+def seed_admin():
+    if db.session.query(User.id).first() is not None:
+        return False
+    user = User(username=DEFAULT_ADMIN['username'], email=DEFAULT_ADMIN['email'], is_admin=True)
+    user.set_password(DEFAULT_ADMIN['password'])
+    db.session.add(user)
+    return True
+
+
+def seed_challenges(replace=False):
+    """Insère les challenges par défaut ; renvoie (nombre, fichiers à collecter)."""
+    released = []
+    if replace:
+        # Fichiers libérés ici, supprimés après la validation
+        released = [path for path, in db.session.query(Challenge.file_path).filter(Challenge.file_path.isnot(None))]
+        artifacts.release(released)
+        Challenge.query.delete()
+    elif db.session.query(Challenge.id).first() is not None:
+        return 0, []
+    db.session.add_all(Challenge(is_active=True, **values) for values in DEFAULT_CHALLENGES)
+    return len(DEFAULT_CHALLENGES), released
+
+
+def upgrade_schema():
+    """Applique les migrations Alembic (flask db upgrade).
+
+    Une base créée par create_all avant l'arrivée des migrations n'a pas
+    de table alembic_version : elle est d'abord marquée à la révision
+    d'origine, puis mise à jour.
+    """
+    # Import local : alembic n'est chargé que par l'initialisation
+    from flask_migrate import Migrate, stamp, upgrade
+
+    if 'migrate' not in current_app.extensions:
+        Migrate(current_app, db, directory=MIGRATIONS_DIR)
+    tables = db.inspect(db.engine).get_table_names()
+    if 'alembic_version' not in tables and 'users' in tables:
+        stamp(directory=MIGRATIONS_DIR, revision=BASELINE_REVISION)
+    upgrade(directory=MIGRATIONS_DIR)
+
+
+def bootstrap(replace_challenges=False):
+    """Met le schéma à jour et insère les données par défaut, une seule fois."""
+    with db.engine.connect() as connection:
+        # Verrou gardé pendant toute la migration, faite sur une autre connexion
+        _lock(connection)
+        upgrade_schema()
+    _lock(db.session)
+    created_admin = seed_admin()
+    created_challenges, released = seed_challenges(replace=replace_challenges)
+    db.session.commit()
+    artifacts.collect(released)
+    return created_admin, created_challenges
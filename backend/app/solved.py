@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class SolvedSets:
+    """Ensemble des challenges résolus par utilisateur, sous forme de bitmap.
+
+    Le bit n d'un entier est à 1 si le challenge d'identifiant n est résolu.
+    Le bitmap est chargé une fois par utilisateur puis mis à jour sur place
+    par submit_flag ; les entrées les moins récemment utilisées sont
+    évincées au-delà de SOLVED_CACHE_MAX_BYTES.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def init_app(self, app):
+        app.config.setdefault('SOLVED_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+        app.config.setdefault('SOLVED_CACHE_TTL', 60)
+        app.extensions['solved_sets'] = self
+
+    @staticmethod
+    def _size(bits):
+        return (bits.bit_length() + 7) // 8 + 64
+
+    def _load(self, user_id):
+        from .models import db, SolvedChallenge
+
+        bits = 0
+        for (challenge_id,) in db.session.query(SolvedChallenge.challenge_id).filter_by(user_id=user_id):
+            bits |= 1 << challenge_id
+        return bits
+
+    def _store(self, user_id, bits, loaded_at):
+        previous = self._entries.pop(user_id, None)
+        if previous is not None:
+            self._bytes -= self._size(previous[1])
+        self._entries[user_id] = (loaded_at, bits)
+        self._bytes += self._size(bits)
+        max_bytes = current_app.config['SOLVED_CACHE_MAX_BYTES']
+        while self._bytes > max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= self._size(evicted)
+
+    def get(self, user_id):
+        ttl = current_app.config['SOLVED_CACHE_TTL']
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] <= ttl:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        loaded_at = time.monotonic()
+        bits = self._load(user_id)
+        with self._lock:
+            self._store(user_id, bits, loaded_at)
+        return bits
+
+    def add(self, user_id, challenge_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._store(user_id, entry[1] | (1 << challenge_id), entry[0])
+
+    def contains(self, user_id, challenge_id):
+        return bool(self.get(user_id) >> challenge_id & 1)
+
+    def count(self, user_id):
+        return bin(self.get(user_id)).count('1')
+
+    def discard(self, user_id):
+        with self._lock:
+            entry = self._entries.pop(user_id, None)
+            if entry is not None:
+                self._bytes -= self._size(entry[1])
+
+
+solved_sets = SolvedSets()
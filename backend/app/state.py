@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+StateValue = namedtuple('StateValue', ['value', 'version'])
+
+
+class SharedState:
+    """Petites valeurs partagées entre workers, stockées dans `settings`.
+
+    Chaque clé porte une valeur et un numéro de version incrémenté à chaque
+    écriture. Les lectures sont mises en cache localement pendant
+    SHARED_STATE_TTL secondes : un changement fait sur un worker est vu par
+    les autres au plus tard après ce délai, sans requête à chaque appel.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def init_app(self, app):
+        app.config.setdefault('SHARED_STATE_TTL', 2)
+        app.extensions['shared_state'] = self
+
+    def get(self, key):
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] <= current_app.config['SHARED_STATE_TTL']:
+            return cached[1]
+
+        from .models import db, Setting
+
+        row = db.session.query(Setting.value, Setting.version).filter_by(key=key).first()
+        state = StateValue(row.value, row.version) if row else StateValue(None, 0)
+        with self._lock:
+            self._cache[key] = (time.monotonic(), state)
+        return state
+
+    def version(self, key):
+        return self.get(key).version
+
+    def set(self, key, value=None, bump_only=False):
+        """Écrit la valeur et incrémente la version de façon atomique."""
+        from .models import db, Setting
+
+        values = {'version': Setting.version + 1, 'updated_at': datetime.utcnow()}
+        if not bump_only:
+            values['value'] = value
+        for _ in range(2):
+            if db.session.query(Setting).filter_by(key=key).update(values, synchronize_session=False):
+                break
+            try:
+                with db.session.begin_nested():
+                    db.session.add(Setting(key=key, value=value, version=1))
+                break
+            except IntegrityError:
+                # Créée entre-temps par un autre worker : on refait l'UPDATE
+                continue
+        db.session.commit()
+        self.invalidate(key)
+
+    def bump(self, key):
+        self.set(key, bump_only=True)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
+
+
+shared_state = SharedState()
@@ -0,0 +1,220 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from .solved import solved_sets
+
+
+class UserStats:
+    """Statistiques par utilisateur, calculées en deux requêtes et mémorisées.
+
+    Une requête jointe donne la liste des challenges résolus, un GROUP BY
+    donne la répartition par catégorie et difficulté. Le résultat est gardé
+    en cache (LRU) jusqu'au prochain flag validé par l'utilisateur, ou au
+    plus USER_STATS_TTL secondes. Le nombre de résolutions est aussi
+    comparé au bitmap de `solved_sets` avant de servir une entrée.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def init_app(self, app):
+        app.config.setdefault('USER_STATS_CACHE_SIZE', 5000)
+        app.config.setdefault('USER_STATS_TTL', 60)
+        app.extensions['user_stats'] = self
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[0] <= current_app.config['USER_STATS_TTL']:
+                self._entries.move_to_end(user_id)
+                cached = entry[1]
+            else:
+                cached = None
+
+        # Le bitmap des challenges résolus révèle un flag validé sur un
+        # autre worker sans attendre l'expiration du cache
+        if cached is not None and cached['total_solved'] == solved_sets.count(user_id):
+            return cached
+
+        stats = self._compute(user_id)
+        with self._lock:
+            self._entries[user_id] = (now, stats)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > current_app.config['USER_STATS_CACHE_SIZE']:
+                self._entries.popitem(last=False)
+        return stats
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def _compute(self, user_id):
+        from .models import db, Challenge, SolvedChallenge
+
+        solved = db.session.query(
+            Challenge.id,
+            Challenge.title,
+            Challenge.category,
+            Challenge.difficulty,
+            Challenge.points,
+            SolvedChallenge.solved_at
+        ).join(SolvedChallenge, SolvedChallenge.challenge_id == Challenge.id) \
+         .filter(SolvedChallenge.user_id == user_id) \
+         .order_by(SolvedChallenge.solved_at) \
+         .all()
+
+        breakdown = db.session.query(
+            Challenge.category,
+            Challenge.difficulty,
+            db.func.count(SolvedChallenge.id)
+        ).join(SolvedChallenge, SolvedChallenge.challenge_id == Challenge.id) \
+         .filter(SolvedChallenge.user_id == user_id) \
+         .group_by(Challenge.category, Challenge.difficulty) \
+         .all()
+
+        by_category = {}
+        by_difficulty = {}
+        for category, difficulty, count in breakdown:
+            by_category[category] = by_category.get(category, 0) + count
+            by_difficulty[difficulty] = by_difficulty.get(difficulty, 0) + count
+
+        return {
+            'solved_challenges': [{
+                'id': row.id,
+                'title': row.title,
+                'category': row.category,
+                'difficulty': row.difficulty,
+                'points': row.points,
+                'solved_at': row.solved_at.isoformat()
+            } for row in solved],
+            'total_solved': len(solved),
+            'solved_by_category': by_category,
+            'solved_by_difficulty': by_difficulty
+        }
+
+
+class AdminStats:
+    """Statistiques du tableau de bord administrateur, en deux requêtes.
+
+    La première parcourt les challenges avec, par fenêtre sur
+    solved_challenges, le nombre de résolutions et le premier solveur
+    (first blood) ; les compteurs globaux en sont déduits. La seconde
+    compte les résolutions par heure sur ADMIN_STATS_HOURS heures. Le
+    résultat est partagé pendant ADMIN_STATS_CACHE_SECONDS secondes et un
+    seul calcul a lieu à la fois par worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cached = None
+        self._computed_at = None
+
+    def init_app(self, app):
+        app.config.setdefault('ADMIN_STATS_CACHE_SECONDS', 10)
+        app.config.setdefault('ADMIN_STATS_HOURS', 24)
+        app.extensions['admin_stats'] = self
+
+    def _fresh(self):
+        return self._cached is not None and \
+            time.monotonic() - self._computed_at <= current_app.config['ADMIN_STATS_CACHE_SECONDS']
+
+    def get(self):
+        if self._fresh():
+            return self._cached
+        with self._lock:
+            # Les requêtes arrivées pendant le calcul réutilisent son résultat
+            if not self._fresh():
+                self._cached = self._compute()
+                self._computed_at = time.monotonic()
+            return self._cached
+
+    def invalidate(self):
+        with self._lock:
+            self._cached = None
+
+    def _compute(self):
+        from .models import db, User, Challenge, SolvedChallenge
+
+        ranked = db.select(
+            SolvedChallenge.challenge_id,
+            SolvedChallenge.user_id,
+            SolvedChallenge.solved_at,
+            db.func.row_number().over(
+                partition_by=SolvedChallenge.challenge_id,
+                order_by=(SolvedChallenge.solved_at, SolvedChallenge.id)
+            ).label('position'),
+            db.func.count().over(partition_by=SolvedChallenge.challenge_id).label('solves')
+        ).subquery()
+
+        rows = db.session.execute(
+            db.select(
+                Challenge.id,
+                Challenge.title,
+                Challenge.category,
+                Challenge.difficulty,
+                Challenge.is_active,
+                ranked.c.solves,
+                ranked.c.solved_at,
+                User.id.label('user_id'),
+                User.username,
+                db.select(db.func.count(User.id)).scalar_subquery().label('total_users')
+            ).outerjoin(ranked, db.and_(ranked.c.challenge_id == Challenge.id, ranked.c.position == 1))
+             .outerjoin(User, User.id == ranked.c.user_id)
+             .order_by(Challenge.id)
+        ).all()
+
+        category_stats = {}
+        difficulty_stats = {}
+        challenges = []
+        for row in rows:
+            category_stats[row.category] = category_stats.get(row.category, 0) + 1
+            difficulty_stats[row.difficulty] = difficulty_stats.get(row.difficulty, 0) + 1
+            challenges.append({
+                'id': row.id,
+                'title': row.title,
+                'category': row.category,
+                'is_active': row.is_active,
+                'solves': row.solves or 0,
+                'first_blood': {
+                    'user_id': row.user_id,
+                    'username': row.username,
+                    'solved_at': row.solved_at.isoformat()
+                } if row.user_id is not None else None
+            })
+
+        total_users = rows[0].total_users if rows else db.session.query(db.func.count(User.id)).scalar()
+        return {
+            'total_users': total_users,
+            'total_challenges': len(rows),
+            'active_challenges': sum(1 for row in rows if row.is_active),
+            'total_solves': sum(c['solves'] for c in challenges),
+            'category_stats': category_stats,
+            'difficulty_stats': difficulty_stats,
+            'challenges': challenges,
+            'solves_per_hour': self._solves_per_hour()
+        }
+
+    def _solves_per_hour(self):
+        from .models import db, SolvedChallenge
+
+        if db.engine.dialect.name == 'postgresql':
+            hour = db.func.to_char(db.func.date_trunc('hour', SolvedChallenge.solved_at), 'YYYY-MM-DD"T"HH24:00:00')
+        else:
+            hour = db.func.strftime('%Y-%m-%dT%H:00:00', SolvedChallenge.solved_at)
+        since = datetime.utcnow() - timedelta(hours=current_app.config['ADMIN_STATS_HOURS'])
+        rows = db.session.query(hour.label('hour'), db.func.count(SolvedChallenge.id)) \
+            .filter(SolvedChallenge.solved_at >= since) \
+            .group_by('hour') \
+            .order_by('hour') \
+            .all()
+        return [{'hour': hour, 'solves': count} for hour, count in rows]
+
+
+user_stats = UserStats()
+admin_stats = AdminStats()
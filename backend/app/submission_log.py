@@ -0,0 +1,141 @@
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """Table en ajout seul, écrite par lots en arrière-plan.
+
+    `_append` ne fait qu'ajouter une ligne à un tampon en mémoire ; un
+    thread l'écrit en base dès que <PREFIX>_BATCH_SIZE lignes sont en
+    attente ou toutes les <PREFIX>_FLUSH_INTERVAL secondes. Le tampon est
+    vidé à l'arrêt du worker, une fois le thread arrêté.
+    """
+
+    config_prefix = None
+    model_name = None
+    batch_size = 200
+    flush_interval = 2.0
+    max_buffer = 50000
+
+    def __init__(self):
+        self._app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = deque()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._registered = False
+        self.written = 0
+        self.dropped = 0
+
+    def init_app(self, app):
+        app.config.setdefault(f'{self.config_prefix}_BATCH_SIZE', self.batch_size)
+        app.config.setdefault(f'{self.config_prefix}_FLUSH_INTERVAL', self.flush_interval)
+        app.config.setdefault(f'{self.config_prefix}_MAX_BUFFER', self.max_buffer)
+        app.extensions[self.config_prefix.lower()] = self
+        self._app = app
+        # Plusieurs applications peuvent partager l'instance (tests, bench)
+        if not self._registered:
+            atexit.register(self.close)
+            self._registered = True
+
+    def _config(self, name):
+        return self._app.config[f'{self.config_prefix}_{name}']
+
+    def _append(self, row):
+        with self._lock:
+            if len(self._buffer) >= self._config('MAX_BUFFER'):
+                # La base ne suit pas : on sacrifie les plus anciennes lignes
+                # plutôt que de bloquer les requêtes.
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(row)
+            pending = len(self._buffer)
+            if self._thread is None:
+                self._start()
+        if pending >= self._config('BATCH_SIZE'):
+            self._wakeup.set()
+
+    def _start(self):
+        # Démarré à la première écriture, donc après le fork des workers
+        name = self.config_prefix.lower().replace('_', '-')
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        interval = self._config('FLUSH_INTERVAL')
+        while not self._stopping:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _take(self, size):
+        with self._lock:
+            count = min(size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def flush(self):
+        from . import models
+        from .models import db
+
+        model = getattr(models, self.model_name)
+        batch_size = self._config('BATCH_SIZE')
+        with self._flush_lock, self._app.app_context():
+            while True:
+                rows = self._take(batch_size)
+                if not rows:
+                    break
+                try:
+                    db.session.execute(db.insert(model), rows)
+                    db.session.commit()
+                    self.written += len(rows)
+                except Exception:
+                    db.session.rollback()
+                    self.dropped += len(rows)
+                    logger.exception('Could not write %d %s rows', len(rows), self.model_name)
+                    break
+            db.session.remove()
+
+    def close(self):
+        self._stopping = True
+        self._wakeup.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            # Le thread termine son lot en cours avant le dernier flush
+            thread.join()
+        if self._buffer:
+            self.flush()
+
+    def __len__(self):
+        return len(self._buffer)
+
+
+class SubmissionLog(BatchWriter):
+    """Journal des tentatives de flag (table submissions).
+
+    Le texte soumis n'est gardé que pour les tentatives incorrectes : une
+    tentative correcte contient le flag du challenge.
+    """
+
+    config_prefix = 'SUBMISSION_LOG'
+    model_name = 'Submission'
+
+    def record(self, user_id, challenge_id, is_correct, flag=None, ip=None):
+        self._append({
+            'user_id': user_id,
+            'challenge_id': challenge_id,
+            'is_correct': is_correct,
+            'flag': flag[:200] if isinstance(flag, str) and not is_correct else None,
+            'ip': ip,
+            'submitted_at': datetime.utcnow()
+        })
+
+
+submission_log = SubmissionLog()
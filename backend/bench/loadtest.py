@@ -0,0 +1,348 @@
+"""Test de charge reproductible de l'API.
+
+Démarre l'application (create_app) sur une base locale, y crée
+--players joueurs répartis en --teams équipes, --challenges challenges
+(statiques et dynamiques) et un historique de résolutions, puis rejoue
+un mélange de requêtes : connexion, liste et détail des challenges,
+soumission de flag, consultation des classements. Chaque client virtuel
+tire ses requêtes avec sa propre graine : deux exécutions avec les
+mêmes paramètres rejouent la même séquence.
+
+Affiche p50/p95/p99 et requêtes par seconde par endpoint, et enregistre
+le résultat dans bench/results/<commit>.json pour comparer les commits :
+
+    python bench/loadtest.py --players 5000 --clients 16 --requests 500
+    python bench/loadtest.py --compare 11385e3
+
+Avec --database-url, utiliser une base PostgreSQL jetable : --reset
+supprime toutes ses tables avant le peuplement.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'bench', 'results')
+
+sys.path.insert(0, BACKEND_DIR)
+
+ENDPOINTS = ('login', 'challenges', 'challenge', 'submit', 'leaderboard', 'team_leaderboard')
+DEFAULT_MIX = 'login=5,challenges=25,challenge=10,submit=20,leaderboard=30,team_leaderboard=10'
+PASSWORD = 'bench-password'
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f'unknown endpoint {name!r} (expected one of {", ".join(ENDPOINTS)})')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_revision():
+    def git(*command):
+        return subprocess.run(['git', *command], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+
+    commit = git('rev-parse', '--short=12', 'HEAD') or 'unknown'
+    dirty = bool(git('status', '--porcelain', '--untracked-files=no'))
+    return commit, dirty
+
+
+def seed(db, args, rng):
+    """Peuple la base ; renvoie (noms des joueurs, {id de challenge: flag})."""
+    from app.models import User, Challenge, SolvedChallenge, Team, team_members
+    from app.passwords import password_hasher
+    from app.scoring import challenge_value, reconcile_team_scores
+
+    # Un seul hash pour tous les joueurs : la connexion coûte une
+    # vérification réelle, le peuplement ne coûte qu'un hachage
+    password_hash = password_hasher.hash(PASSWORD)
+    db.session.execute(db.insert(User), [
+        {'username': f'player{i}', 'email': f'player{i}@bench.local', 'password_hash': password_hash, 'score': 0}
+        for i in range(args.players)
+    ])
+    db.session.execute(db.insert(Challenge), [
+        {'title': f'bench {i}', 'description': 'Challenge de test de charge.', 'category': f'cat{i % 6}',
+         'difficulty': ('Easy', 'Medium', 'Hard')[i % 3], 'points': 100 * (1 + i % 5),
+         'flag': f'BENCH{{{i}}}', 'flag_mode': 'exact', 'is_active': True,
+         'scoring': 'static' if i % 2 else 'logarithmic', 'initial_points': 500, 'minimum_points': 100,
+         'decay': max(args.players // 10, 1)}
+        for i in range(args.challenges)
+    ])
+    db.session.execute(db.insert(Team), [{'name': f'team{i}', 'score': 0} for i in range(args.teams)])
+
+    players = db.session.execute(
+        db.select(User.id, User.username).where(User.username.like('player%'))
+    ).all()
+    challenges = db.session.execute(
+        db.select(Challenge.id, Challenge.flag, Challenge.scoring, Challenge.points).where(Challenge.title.like('bench %'))
+    ).all()
+    team_ids = db.session.execute(db.select(Team.id)).scalars().all()
+
+    if team_ids:
+        db.session.execute(team_members.insert(), [
+            {'team_id': team_ids[position % len(team_ids)], 'user_id': user_id}
+            for position, (user_id, _) in enumerate(players)
+        ])
+
+    # Historique : chaque joueur a déjà résolu quelques challenges
+    start = datetime.utcnow() - timedelta(hours=6)
+    rows = []
+    for user_id, _ in players:
+        for challenge in rng.sample(challenges, min(args.solves_per_player, len(challenges))):
+            rows.append({'user_id': user_id, 'challenge_id': challenge.id,
+                         'solved_at': start + timedelta(seconds=rng.randrange(6 * 3600))})
+    for offset in range(0, len(rows), 10000):
+        db.session.execute(db.insert(SolvedChallenge), rows[offset:offset + 10000])
+
+    # Valeurs des challenges dynamiques puis scores cohérents, en bloc
+    counts = dict(db.session.execute(
+        db.select(SolvedChallenge.challenge_id, db.func.count()).group_by(SolvedChallenge.challenge_id)
+    ).all())
+    db.session.execute(db.update(Challenge), [
+        {'id': challenge.id,
+         'points': challenge_value('logarithmic', 500, 100, max(args.players // 10, 1), counts.get(challenge.id, 0))}
+        for challenge in challenges if challenge.scoring != 'static'
+    ])
+    total = db.select(db.func.coalesce(db.func.sum(Challenge.points), 0)) \
+        .select_from(SolvedChallenge).join(Challenge, Challenge.id == SolvedChallenge.challenge_id) \
+        .where(SolvedChallenge.user_id == User.id) \
+        .scalar_subquery()
+    db.session.execute(db.update(User).values(score=total))
+    db.session.commit()
+    reconcile_team_scores()
+    return [username for _, username in players], {challenge.id: challenge.flag for challenge in challenges}
+
+
+class Client:
+    """Client virtuel : un joueur connecté qui enchaîne les requêtes du mélange."""
+
+    def __init__(self, app, usernames, flags, args, rng, record):
+        self.http = app.test_client()
+        self.usernames = usernames
+        self.flags = flags
+        self.challenge_ids = sorted(flags)
+        self.args = args
+        self.rng = rng
+        self.record = record
+        self.headers = {}
+
+    def call(self, name, method, path, expected=(200,), **kwargs):
+        started = time.perf_counter()
+        response = self.http.open(path, method=method, headers=self.headers, **kwargs)
+        elapsed = time.perf_counter() - started
+        self.record(name, elapsed, response.status_code in expected)
+        return response
+
+    def login(self):
+        response = self.call('login', 'POST', '/api/auth/login',
+                             json={'username': self.rng.choice(self.usernames), 'password': PASSWORD})
+        if response.status_code == 200:
+            self.headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    def challenges(self):
+        self.call('challenges', 'GET', '/api/challenges/')
+
+    def challenge(self):
+        self.call('challenge', 'GET', f'/api/challenges/{self.rng.choice(self.challenge_ids)}')
+
+    def submit(self):
+        challenge_id = self.rng.choice(self.challenge_ids)
+        flag = self.flags[challenge_id] if self.rng.random() < self.args.correct else 'BENCH{wrong}'
+        # 400 : flag incorrect ou challenge déjà résolu, réponses attendues
+        self.call('submit', 'POST', f'/api/challenges/{challenge_id}/submit', expected=(200, 400),
+                  json={'flag': flag})
+
+    def leaderboard(self):
+        self.call('leaderboard', 'GET', '/api/users/leaderboard?limit=20')
+
+    def team_leaderboard(self):
+        self.call('team_leaderboard', 'GET', '/api/teams/leaderboard?limit=20')
+
+    def run(self, mix, count):
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        self.login()
+        for name in self.rng.choices(names, weights, k=count):
+            getattr(self, name)()
+
+
+def run(app, usernames, flags, args):
+    samples = {name: [] for name in ENDPOINTS}
+    errors = {name: 0 for name in ENDPOINTS}
+    lock = threading.Lock()
+
+    def record(name, elapsed, ok):
+        with lock:
+            samples[name].append(elapsed)
+            if not ok:
+                errors[name] += 1
+
+    # Échauffement hors mesure : caches et classement en mémoire construits
+    warmup = Client(app, usernames, flags, args, random.Random(-1), lambda *_: None)
+    warmup.run({name: 1 for name in ENDPOINTS if name != 'submit'}, 2 * len(ENDPOINTS))
+
+    clients = [Client(app, usernames, flags, args, random.Random(args.seed * 1000 + number), record)
+               for number in range(args.clients)]
+    threads = [threading.Thread(target=client.run, args=(args.mix, args.requests)) for client in clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    def summary(values, failed):
+        return {
+            'count': len(values),
+            'errors': failed,
+            'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+            'rps': round(len(values) / elapsed, 1)
+        }
+
+    endpoints = {name: summary(values, errors[name]) for name, values in samples.items() if values}
+    everything = [value for values in samples.values() for value in values]
+    return elapsed, endpoints, summary(everything, sum(errors.values()))
+
+
+def print_table(endpoints, total):
+    print(f'{"endpoint":<18} {"count":>7} {"errors":>7} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"req/s":>9}')
+    for name, row in list(endpoints.items()) + [('total', total)]:
+        print(f'{name:<18} {row["count"]:>7} {row["errors"]:>7} {row["p50_ms"]:>9.2f} '
+              f'{row["p95_ms"]:>9.2f} {row["p99_ms"]:>9.2f} {row["rps"]:>9.1f}')
+
+
+def find_result(reference):
+    if os.path.isfile(reference):
+        return reference
+    matches = sorted(glob.glob(os.path.join(RESULTS_DIR, f'{reference}*.json')))
+    if not matches:
+        raise SystemExit(f'no saved result matches {reference!r} in {RESULTS_DIR}')
+    return matches[-1]
+
+
+def compare(baseline, result, threshold):
+    """Affiche les écarts avec un résultat enregistré ; renvoie les régressions."""
+    print(f'\ncompared with {baseline["commit"]}{" (dirty)" if baseline["dirty"] else ""} '
+          f'recorded {baseline["recorded_at"]}')
+    if baseline['parameters'] != result['parameters']:
+        print('warning: parameters differ, the comparison may not be meaningful')
+    print(f'{"endpoint":<18} {"p95 before":>11} {"p95 after":>10} {"change":>8} {"req/s before":>13} {"req/s after":>12}')
+    regressions = []
+    rows = dict(result['endpoints'], total=result['total'])
+    before_rows = dict(baseline['endpoints'], total=baseline['total'])
+    for name, after in rows.items():
+        before = before_rows.get(name)
+        if before is None:
+            continue
+        change = (after['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  <- regression'
+        print(f'{name:<18} {before["p95_ms"]:>11.2f} {after["p95_ms"]:>10.2f} {change:>+7.1f}% '
+              f'{before["rps"]:>13.1f} {after["rps"]:>12.1f}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None, help='base à utiliser (défaut : SQLite temporaire)')
+    parser.add_argument('--reset', action='store_true', help='supprime les tables existantes avant le peuplement')
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--teams', type=int, default=200)
+    parser.add_argument('--challenges', type=int, default=50)
+    parser.add_argument('--solves-per-player', type=int, default=5)
+    parser.add_argument('--clients', type=int, default=8, help='clients virtuels simultanés')
+    parser.add_argument('--requests', type=int, default=300, help='requêtes par client, connexion comprise')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help=f'poids par endpoint ({DEFAULT_MIX})')
+    parser.add_argument('--correct', type=float, default=0.3, help='part des soumissions avec le bon flag')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=None, help='fichier de résultat (défaut : bench/results/<commit>.json)')
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--compare', default=None, metavar='COMMIT_OR_FILE',
+                        help='résultat enregistré à comparer (préfixe de commit ou chemin)')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='hausse du p95 (en %%) considérée comme une régression')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{tempfile.mkdtemp()}/loadtest.db'
+
+    from app import create_app, db
+    from app.models import User
+    from app.seed import bootstrap
+    from app.submission_log import submission_log
+    from app.history import score_history
+
+    app = create_app()
+    # Tous les clients virtuels partagent la même adresse : la limitation
+    # de débit mesurerait le limiteur, pas l'application
+    app.config['RATELIMIT_ENABLED'] = False
+    rng = random.Random(args.seed)
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        bootstrap()
+        if db.session.query(User.id).filter(User.username.like('player%')).first() is not None:
+            raise SystemExit('database already holds benchmark data: use a fresh database or --reset')
+        started = time.perf_counter()
+        usernames, flags = seed(db, args, rng)
+        dialect = db.engine.dialect.name
+        print(f'seeded {args.players} players, {args.teams} teams, {args.challenges} challenges, '
+              f'{args.players * min(args.solves_per_player, args.challenges)} solves '
+              f'on {dialect} in {time.perf_counter() - started:.1f} s')
+
+    elapsed, endpoints, total = run(app, usernames, flags, args)
+    submission_log.flush()
+    score_history.flush()
+    print(f'{total["count"]} requests from {args.clients} clients in {elapsed:.1f} s\n')
+    print_table(endpoints, total)
+
+    commit, dirty = git_revision()
+    parameters = {key: value for key, value in vars(args).items()
+                  if key not in ('database_url', 'reset', 'output', 'no_save', 'compare', 'threshold')}
+    result = {
+        'commit': commit,
+        'dirty': dirty,
+        'recorded_at': datetime.utcnow().isoformat(),
+        'database': dialect,
+        'python': platform.python_version(),
+        'parameters': dict(parameters, database=dialect),
+        'elapsed_s': round(elapsed, 3),
+        'endpoints': endpoints,
+        'total': total
+    }
+    if not args.no_save:
+        path = args.output or os.path.join(RESULTS_DIR, f'{commit}{"-dirty" if dirty else ""}.json')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as output:
+            json.dump(result, output, indent=2)
+        print(f'\nsaved {path}')
+
+    if args.compare:
+        with open(find_result(args.compare)) as baseline:
+            regressions = compare(json.load(baseline), result, args.threshold)
+        sys.exit(1 if regressions else 0)
+    sys.exit(1 if total['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Mesure le coût d'une résolution sur un challenge à score dynamique.
+
+Crée une base avec --challenges challenges dynamiques, --users
+utilisateurs et --solves résolutions, puis compare :
+
+- la résolution incrémentale (record_solve : un UPDATE limité aux
+  solveurs du challenge dont la valeur change) ;
+- le recalcul complet de tous les scores, pour référence.
+
+Vérifie enfin que chaque score est égal à la somme des valeurs courantes
+des challenges résolus.
+
+    python bench/scoring.py --challenges 1000 --solves 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def seed(db, args, rng):
+    from app.models import User, Challenge, SolvedChallenge
+    from app.scoring import challenge_value
+
+    db.session.execute(db.insert(User), [
+        {'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': '!', 'score': 0}
+        for i in range(args.users)
+    ])
+    db.session.execute(db.insert(Challenge), [
+        {'title': f'bench {i}', 'description': '-', 'category': f'cat{i % 8}', 'difficulty': 'Medium',
+         'points': 500, 'flag': f'FLAG{{{i}}}', 'flag_mode': 'exact', 'is_active': True,
+         'scoring': 'logarithmic', 'initial_points': 500, 'minimum_points': 100, 'decay': args.decay}
+        for i in range(args.challenges)
+    ])
+    user_ids = db.session.execute(db.select(User.id)).scalars().all()
+    challenge_ids = db.session.execute(db.select(Challenge.id)).scalars().all()
+
+    pairs = set()
+    while len(pairs) < args.solves:
+        pairs.add((rng.choice(user_ids), rng.choice(challenge_ids)))
+    start = datetime.utcnow() - timedelta(days=1)
+    rows = [{'user_id': u, 'challenge_id': c, 'solved_at': start + timedelta(seconds=i)}
+            for i, (u, c) in enumerate(pairs)]
+    for offset in range(0, len(rows), 10000):
+        db.session.execute(db.insert(SolvedChallenge), rows[offset:offset + 10000])
+
+    # Valeurs et scores initiaux cohérents
+    counts = dict(db.session.execute(
+        db.select(SolvedChallenge.challenge_id, db.func.count()).group_by(SolvedChallenge.challenge_id)
+    ).all())
+    db.session.execute(db.update(Challenge), [
+        {'id': cid, 'points': challenge_value('logarithmic', 500, 100, args.decay, counts.get(cid, 0))}
+        for cid in challenge_ids
+    ])
+    full_recompute(db)
+    db.session.commit()
+    return user_ids, challenge_ids, pairs
+
+
+def full_recompute(db):
+    from app.models import User, Challenge, SolvedChallenge
+
+    total = db.select(db.func.coalesce(db.func.sum(Challenge.points), 0)) \
+        .select_from(SolvedChallenge).join(Challenge, Challenge.id == SolvedChallenge.challenge_id) \
+        .where(SolvedChallenge.user_id == User.id) \
+        .scalar_subquery()
+    db.session.execute(db.update(User).values(score=total))
+
+
+def inconsistent_users(db):
+    from app.models import User, Challenge, SolvedChallenge
+
+    expected = db.select(
+        SolvedChallenge.user_id, db.func.sum(Challenge.points).label('total')
+    ).join(Challenge, Challenge.id == SolvedChallenge.challenge_id) \
+     .group_by(SolvedChallenge.user_id).subquery()
+    return db.session.execute(
+        db.select(db.func.count()).select_from(User)
+        .outerjoin(expected, expected.c.user_id == User.id)
+        .where(db.func.coalesce(expected.c.total, 0) != User.score)
+    ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None, help='base à utiliser (défaut : SQLite temporaire)')
+    parser.add_argument('--challenges', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--solves', type=int, default=100000)
+    parser.add_argument('--decay', type=int, default=200)
+    parser.add_argument('--samples', type=int, default=200, help='résolutions dynamiques mesurées')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{tempfile.mkdtemp()}/scoring.db'
+    os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+    from app import create_app, db
+    from app.seed import bootstrap
+    from app.scoring import record_solve
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    with app.app_context():
+        bootstrap()
+        started = time.perf_counter()
+        user_ids, challenge_ids, pairs = seed(db, args, rng)
+        print(f'seeded {args.challenges} challenges, {args.users} users, {args.solves} solves '
+              f'in {time.perf_counter() - started:.1f} s')
+
+        timings = []
+        updated = []
+        while len(timings) < args.samples:
+            pair = (rng.choice(user_ids), rng.choice(challenge_ids))
+            if pair in pairs:
+                continue
+            pairs.add(pair)
+            started = time.perf_counter()
+            result = record_solve(pair[0], pair[1], dynamic=True)
+            timings.append((time.perf_counter() - started) * 1000)
+            if result.rescore and result.rescore.users:
+                updated.append(len(result.rescore.users))
+
+        print(f'incremental solve: p50 {statistics.median(timings):.2f} ms, '
+              f'p95 {percentile(timings, 0.95):.2f} ms, '
+              f'{statistics.mean(updated) if updated else 0:.0f} solvers updated on average')
+
+        errors = inconsistent_users(db)
+        print(f'inconsistent scores after incremental updates: {errors}')
+
+        started = time.perf_counter()
+        full_recompute(db)
+        db.session.commit()
+        print(f'full recompute:    {(time.perf_counter() - started) * 1000:.2f} ms')
+        sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Compare le débit des workers gunicorn sync et gevent.
+
+Lance gunicorn avec chaque classe de worker, ouvre quelques connexions
+lentes (flux SSE gardés ouverts) puis mesure le nombre de requêtes par
+seconde servies aux autres clients.
+
+    python bench/serving.py --workers 2 --slow-clients 4 --duration 10
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not start on port {port}')
+
+
+def request(port, method, path, body=None, token=None, timeout=30):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    connection.request(method, path, body=json.dumps(body) if body else None, headers=headers)
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, data
+
+
+def hold_stream(port, token, stop):
+    # Client lent : garde un flux SSE ouvert sans le lire
+    try:
+        _, data = request(port, 'POST', '/api/events/ticket', token=token)
+        ticket = json.loads(data)['ticket']
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        connection.request('GET', f'/api/events/stream?ticket={ticket}')
+        connection.getresponse()
+        stop.wait()
+        connection.close()
+    except OSError:
+        pass
+
+
+def prepare_database(env):
+    # Création du schéma et des données de test avant le démarrage des
+    # workers, pour qu'ils ne se disputent pas l'insertion initiale
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'bootstrap'],
+                   cwd=BACKEND_DIR, env=env, check=True)
+
+
+def run_mode(worker_class, args, env):
+    env = dict(env, GUNICORN_WORKER_CLASS=worker_class, WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_BIND=f'127.0.0.1:{args.port}', GUNICORN_TIMEOUT=str(args.duration + 30))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:create_app()'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    stop = threading.Event()
+    try:
+        wait_for_port(args.port)
+        status, data = request(args.port, 'POST', '/api/auth/login',
+                               {'username': args.username, 'password': args.password})
+        if status != 200:
+            raise RuntimeError(f'login failed ({status}): {data!r}')
+        token = json.loads(data)['access_token']
+
+        for _ in range(args.slow_clients):
+            threading.Thread(target=hold_stream, args=(args.port, token, stop), daemon=True).start()
+        time.sleep(1)
+
+        counts = []
+        errors = []
+        deadline = time.monotonic() + args.duration
+
+        def client():
+            done = failed = 0
+            paths = ['/api/challenges/', '/api/users/leaderboard', '/api/auth/me']
+            while time.monotonic() < deadline:
+                try:
+                    status, _ = request(args.port, 'GET', paths[done % len(paths)], token=token, timeout=5)
+                    if status == 200:
+                        done += 1
+                    else:
+                        failed += 1
+                except OSError:
+                    failed += 1
+            counts.append(done)
+            errors.append(failed)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=client) for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        return sum(counts) / elapsed, sum(errors)
+    finally:
+        stop.set()
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None,
+                        help='base utilisée par gunicorn (défaut : SQLite temporaire)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--slow-clients', type=int, default=4)
+    parser.add_argument('--duration', type=int, default=10)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--username', default='test')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--modes', default='sync,gevent')
+    args = parser.parse_args()
+
+    # Flux SSE forcé aussi en mode sync : c'est leur coût qu'on compare
+    env = dict(os.environ, RATELIMIT_BACKEND='memory', PASSWORD_HASH_WORKERS='0',
+               EVENTS_STREAM_ENABLED='true')
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+    else:
+        env['DATABASE_URL'] = f'sqlite:///{tempfile.mkdtemp()}/bench.db'
+
+    prepare_database(env)
+
+    print(f'{"mode":<8} {"req/s":>10} {"errors":>8}')
+    for mode in args.modes.split(','):
+        throughput, errors = run_mode(mode, args, env)
+        print(f'{mode:<8} {throughput:>10.1f} {errors:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Garde-fou sur le temps de démarrage d'un worker.
+
+Mesure, dans des processus neufs, l'import du paquet `app` et l'appel à
+create_app(), et vérifie qu'aucune requête SQL n'est émise pendant le
+démarrage. Sort en erreur si la médiane dépasse le budget.
+
+    python bench/startup.py --runs 5 --max-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+queries = []
+event.listen(Engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+imported = time.perf_counter()
+from app import create_app
+app = create_app()
+done = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (done - imported) * 1000,
+    'queries': len(queries)
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=1500,
+                        help='budget pour import + create_app (médiane)')
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    env['DATABASE_URL'] = args.database_url or f'sqlite:///{tempfile.mkdtemp()}/startup.db'
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    boot = statistics.median(s['import_ms'] + s['create_app_ms'] for s in samples)
+    create = statistics.median(s['create_app_ms'] for s in samples)
+    queries = max(s['queries'] for s in samples)
+    print(f'worker boot (median of {args.runs}): {boot:.0f} ms, create_app: {create:.0f} ms, SQL queries: {queries}')
+
+    failures = []
+    if boot > args.max_ms:
+        failures.append(f'boot time {boot:.0f} ms exceeds budget {args.max_ms:.0f} ms')
+    if queries:
+        failures.append(f'create_app issued {queries} SQL queries, expected none')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# Configuration gunicorn, pilotée par variables d'environnement.
+#
+# GUNICORN_WORKER_CLASS=gevent : chaque worker sert jusqu'à (défaut)
+#                                GUNICORN_WORKER_CONNECTIONS connexions en
+#                                parallèle (flux SSE, téléchargements lents)
+# GUNICORN_WORKER_CLASS=sync   : un processus par requête en cours ; le flux
+#                                SSE est désactivé (chaque connexion
+#                                bloquerait un worker pendant
+#                                EVENTS_MAX_DURATION), le frontend recharge
+#                                les données périodiquement
+#
+# Dimensionnement (voir README) :
+#   sync   : workers = 2 * CPU + 1
+#   gevent : workers = CPU
+#   connexions PostgreSQL = workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+#                           < max_connections - connexions réservées
+import multiprocessing
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+cpus = multiprocessing.cpu_count()
+
+if worker_class == 'sync':
+    # Hérité par les workers, lu par create_app
+    os.environ.setdefault('EVENTS_STREAM_ENABLED', 'false')
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', cpus if worker_class == 'gevent' else 2 * cpus + 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+accesslog = os.getenv('GUNICORN_ACCESSLOG')
+
+
+def post_worker_init(worker):
+    # Le worker gevent a déjà patché la bibliothèque standard ; psycopg2
+    # doit en plus céder la main pendant les attentes réseau, sans quoi une
+    # requête SQL bloque toutes les connexions du worker.
+    if worker_class == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            worker.log.warning('psycogreen is not installed: PostgreSQL calls will block the gevent worker')
+        else:
+            patch_psycopg()
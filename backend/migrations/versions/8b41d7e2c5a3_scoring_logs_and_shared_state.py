@@ -0,0 +1,129 @@
+"""flag modes, submission log, team solves, shared state, dynamic scoring, score history
+
+Revision ID: 8b41d7e2c5a3
+Revises: 3f2a9c1d0b01
+Create Date: 2026-10-18 10:31:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41d7e2c5a3'
+down_revision = '3f2a9c1d0b01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Chaque étape vérifie l'état de la base : un déploiement intermédiaire
+    # a pu créer certaines tables par create_all avant cette migration
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    def columns(table):
+        return {column['name'] for column in inspector.get_columns(table)}
+
+    def indexes(table):
+        return {index['name'] for index in inspector.get_indexes(table)}
+
+    # Challenges : plusieurs flags par ligne, mode de comparaison, score dynamique
+    challenge_columns = columns('challenges')
+    if bind.dialect.name != 'sqlite':
+        op.alter_column('challenges', 'flag', type_=sa.Text(), existing_nullable=False)
+        op.alter_column('users', 'password_hash', type_=sa.String(length=256), existing_nullable=True)
+    if 'flag_mode' not in challenge_columns:
+        op.add_column('challenges', sa.Column('flag_mode', sa.String(length=20), nullable=False,
+                                              server_default='exact'))
+    if 'scoring' not in challenge_columns:
+        op.add_column('challenges', sa.Column('scoring', sa.String(length=20), nullable=False,
+                                              server_default='static'))
+    for name in ('initial_points', 'minimum_points', 'decay'):
+        if name not in challenge_columns:
+            op.add_column('challenges', sa.Column(name, sa.Integer(), nullable=True))
+    if 'ix_solved_challenges_challenge_id' not in indexes('solved_challenges'):
+        op.create_index('ix_solved_challenges_challenge_id', 'solved_challenges', ['challenge_id'])
+    if 'ix_teams_score' not in indexes('teams'):
+        op.create_index('ix_teams_score', 'teams', ['score'])
+
+    if 'submissions' not in tables:
+        op.create_table('submissions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('challenge_id', sa.Integer(), nullable=False),
+            sa.Column('is_correct', sa.Boolean(), nullable=False),
+            sa.Column('flag', sa.String(length=200), nullable=True),
+            sa.Column('ip', sa.String(length=45), nullable=True),
+            sa.Column('submitted_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_submissions_user_submitted_at', 'submissions', ['user_id', 'submitted_at'])
+        op.create_index('ix_submissions_challenge_submitted_at', 'submissions', ['challenge_id', 'submitted_at'])
+
+    if 'team_solves' not in tables:
+        op.create_table('team_solves',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('team_id', sa.Integer(), nullable=False),
+            sa.Column('challenge_id', sa.Integer(), nullable=False),
+            sa.Column('solved_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['challenge_id'], ['challenges.id'], ),
+            sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('team_id', 'challenge_id')
+        )
+        # Résolutions d'équipe reconstruites depuis celles des membres,
+        # puis scores d'équipe recalculés (jamais tenus à jour avant)
+        op.execute(
+            'INSERT INTO team_solves (team_id, challenge_id, solved_at) '
+            'SELECT team_members.team_id, solved_challenges.challenge_id, MIN(solved_challenges.solved_at) '
+            'FROM solved_challenges JOIN team_members ON team_members.user_id = solved_challenges.user_id '
+            'GROUP BY team_members.team_id, solved_challenges.challenge_id'
+        )
+        op.execute(
+            'UPDATE teams SET score = (SELECT COALESCE(SUM(challenges.points), 0) FROM team_solves '
+            'JOIN challenges ON challenges.id = team_solves.challenge_id WHERE team_solves.team_id = teams.id)'
+        )
+    if 'ix_team_solves_challenge_id' not in indexes('team_solves'):
+        op.create_index('ix_team_solves_challenge_id', 'team_solves', ['challenge_id'])
+
+    if 'settings' not in tables:
+        op.create_table('settings',
+            sa.Column('key', sa.String(length=64), nullable=False),
+            sa.Column('value', sa.Text(), nullable=True),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('key')
+        )
+
+    if 'score_checkpoints' not in tables:
+        op.create_table('score_checkpoints',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('subject_type', sa.String(length=4), nullable=False),
+            sa.Column('subject_id', sa.Integer(), nullable=False),
+            sa.Column('score', sa.Integer(), nullable=False),
+            sa.Column('recorded_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_score_checkpoints_subject', 'score_checkpoints',
+                        ['subject_type', 'subject_id', 'recorded_at'])
+
+
+def downgrade():
+    op.drop_index('ix_score_checkpoints_subject', table_name='score_checkpoints')
+    op.drop_table('score_checkpoints')
+    op.drop_table('settings')
+    op.drop_index('ix_team_solves_challenge_id', table_name='team_solves')
+    op.drop_table('team_solves')
+    op.drop_index('ix_submissions_challenge_submitted_at', table_name='submissions')
+    op.drop_index('ix_submissions_user_submitted_at', table_name='submissions')
+    op.drop_table('submissions')
+    op.drop_index('ix_teams_score', table_name='teams')
+    op.drop_index('ix_solved_challenges_challenge_id', table_name='solved_challenges')
+    with op.batch_alter_table('challenges') as batch:
+        for name in ('decay', 'minimum_points', 'initial_points', 'scoring', 'flag_mode'):
+            batch.drop_column(name)
+        batch.alter_column('flag', type_=sa.String(length=100), existing_nullable=False)
+    with op.batch_alter_table('users') as batch:
+        batch.alter_column('password_hash', type_=sa.String(length=128), existing_nullable=True)
@@ -0,0 +1,33 @@
+"""artifact reference counts
+
+Revision ID: c7e19a4f2d60
+Revises: 8b41d7e2c5a3
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e19a4f2d60'
+down_revision = '8b41d7e2c5a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('artifact_refs',
+        sa.Column('path', sa.String(length=200), nullable=False),
+        sa.Column('refcount', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('path')
+    )
+    # Références existantes : une par challenge qui pointe vers le fichier
+    op.execute(
+        'INSERT INTO artifact_refs (path, refcount) '
+        'SELECT file_path, COUNT(*) FROM challenges WHERE file_path IS NOT NULL GROUP BY file_path'
+    )
+
+
+def downgrade():
+    op.drop_table('artifact_refs')
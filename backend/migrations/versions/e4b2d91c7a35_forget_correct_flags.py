@@ -0,0 +1,24 @@
+"""forget the text of correct submissions
+
+Revision ID: e4b2d91c7a35
+Revises: c7e19a4f2d60
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b2d91c7a35'
+down_revision = 'c7e19a4f2d60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Une tentative correcte contient le flag du challenge
+    op.execute('UPDATE submissions SET flag = NULL WHERE is_correct')
+
+
+def downgrade():
+    pass
@@ -0,0 +1,87 @@
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'test-password'
+_names = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    # Une base SQLite par session : les caches en mémoire (classement,
+    # flags, identités) sont des singletons de module, partagés par les
+    # tests, qui créent donc chacun leurs propres utilisateurs et challenges
+    directory = tmp_path_factory.mktemp('ctf')
+    os.environ.update(
+        DATABASE_URL=f'sqlite:///{directory}/test.db',
+        UPLOAD_FOLDER=str(directory / 'uploads'),
+        PASSWORD_HASH_WORKERS='0',
+        PASSWORD_HASH_METHOD='pbkdf2:sha256:1000',
+    )
+    from app import create_app
+    from app.seed import bootstrap
+
+    app = create_app()
+    app.config.update(TESTING=True, RATELIMIT_ENABLED=False)
+    with app.app_context():
+        bootstrap()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app, client):
+    """Crée un utilisateur ; renvoie (id, en-têtes d'authentification)."""
+    def make():
+        username = f'player{next(_names)}'
+        response = client.post('/api/auth/register', json={
+            'username': username, 'email': f'{username}@example.com', 'password': PASSWORD
+        })
+        assert response.status_code == 201, response.get_json()
+        response = client.post('/api/auth/login', json={'username': username, 'password': PASSWORD})
+        return response.get_json()['user']['id'], {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    return make
+
+
+@pytest.fixture
+def admin_headers(client):
+    """En-têtes de l'administrateur créé par bootstrap."""
+    response = client.post('/api/auth/login', json={'username': 'test', 'password': 'password123'})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+@pytest.fixture
+def make_challenge(app):
+    """Crée un challenge actif ; renvoie (id, flag)."""
+    from app.models import db, Challenge
+
+    def make(**fields):
+        number = next(_names)
+        values = dict(title=f'challenge {number}', description='-', category='Test', difficulty='Easy',
+                      points=100, flag=f'FLAG{{{number}}}', is_active=True)
+        values.update(fields)
+        with app.app_context():
+            challenge = Challenge(**values)
+            db.session.add(challenge)
+            db.session.commit()
+            return challenge.id, challenge.flag
+    return make
+
+
+@pytest.fixture
+def score_of(app):
+    """Score d'un utilisateur, relu en base."""
+    from app.models import db, User
+
+    def score(user_id):
+        with app.app_context():
+            return db.session.get(User, user_id).score
+    return score
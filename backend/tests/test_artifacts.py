@@ -0,0 +1,64 @@
+import io
+import os
+import threading
+import time
+
+from app.artifacts import artifacts
+
+
+def _create(client, admin_headers, title, **fields):
+    data = dict(title=title, description='-', category='Files', difficulty='Easy', points='100',
+                flag='FLAG{file}', **fields)
+    response = client.post('/api/admin/challenges', headers=admin_headers, data=data,
+                           content_type='multipart/form-data')
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['challenge']['id']
+
+
+def _refcount(app, path):
+    from app.models import db, ArtifactRef
+
+    with app.app_context():
+        ref = db.session.get(ArtifactRef, path)
+        return ref.refcount if ref else None
+
+
+def test_shared_blob_is_removed_with_its_last_reference(app, client, admin_headers):
+    first = _create(client, admin_headers, 'artifact shared 1', file=(io.BytesIO(b'shared blob'), 'dump.pcap'))
+    with app.app_context():
+        from app.models import db, Challenge
+        path = db.session.get(Challenge, first).file_path
+        digest = os.path.basename(path)
+    second = _create(client, admin_headers, 'artifact shared 2', artifact=digest, filename='dump.pcap')
+    assert _refcount(app, path) == 2
+
+    assert client.delete(f'/api/admin/challenges/{first}', headers=admin_headers).status_code == 200
+    assert os.path.exists(path) and _refcount(app, path) == 1
+
+    assert client.delete(f'/api/admin/challenges/{second}', headers=admin_headers).status_code == 200
+    assert not os.path.exists(path) and _refcount(app, path) is None
+
+
+def test_collect_waits_for_a_concurrent_reference(app):
+    with app.app_context():
+        path, _, _ = artifacts.store(io.BytesIO(b'concurrent reference'))
+    acquired = threading.Event()
+
+    def reference():
+        from app.models import db
+
+        with app.app_context():
+            # Transaction ouverte : le compteur reste verrouillé
+            artifacts.acquire([path])
+            acquired.set()
+            time.sleep(0.3)
+            db.session.commit()
+
+    thread = threading.Thread(target=reference)
+    thread.start()
+    acquired.wait(5)
+    with app.app_context():
+        assert artifacts.collect([path]) == 0
+    thread.join()
+
+    assert os.path.exists(path) and _refcount(app, path) == 1
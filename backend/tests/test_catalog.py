@@ -0,0 +1,54 @@
+from app.catalog import catalog
+
+
+def _titles(response):
+    return {challenge['title'] for challenge in response.get_json()['challenges']}
+
+
+def test_unchanged_catalog_answers_304(client, make_user, make_challenge):
+    _, headers = make_user()
+    make_challenge()
+    first = client.get('/api/challenges/', headers=headers)
+    assert first.status_code == 200 and first.headers['ETag']
+
+    again = client.get('/api/challenges/', headers=dict(headers, **{'If-None-Match': first.headers['ETag']}))
+    assert again.status_code == 304 and not again.data
+
+    # Le filtre fait partie de l'ETag
+    filtered = client.get('/api/challenges/?category=Test',
+                          headers=dict(headers, **{'If-None-Match': first.headers['ETag']}))
+    assert filtered.status_code == 200
+
+
+def test_admin_change_and_own_solve_change_the_etag(client, admin_headers, make_user, make_challenge):
+    _, headers = make_user()
+    challenge_id, flag = make_challenge()
+    etag = client.get('/api/challenges/', headers=headers).headers['ETag']
+
+    assert client.put(f'/api/admin/challenges/{challenge_id}', headers=admin_headers,
+                      data={'title': 'catalog renamed'}).status_code == 200
+    response = client.get('/api/challenges/', headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200 and 'catalog renamed' in _titles(response)
+
+    etag = response.headers['ETag']
+    assert client.post(f'/api/challenges/{challenge_id}/submit', headers=headers,
+                       json={'flag': flag}).status_code == 200
+    response = client.get('/api/challenges/', headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+
+
+def test_update_bumps_the_catalog_once(client, admin_headers, make_user, make_challenge, score_of, monkeypatch):
+    user_id, headers = make_user()
+    challenge_id, flag = make_challenge(points=500, scoring='linear', initial_points=500, minimum_points=100, decay=50)
+    assert client.post(f'/api/challenges/{challenge_id}/submit', headers=headers,
+                       json={'flag': flag}).status_code == 200
+    assert score_of(user_id) == 500
+
+    bumps = []
+    bump = catalog.bump
+    monkeypatch.setattr(catalog, 'bump', lambda: bumps.append(bump()))
+    # Nouvelle valeur initiale reportée sur le solveur dans la même requête
+    assert client.put(f'/api/admin/challenges/{challenge_id}', headers=admin_headers,
+                      data={'initial_points': '400'}).status_code == 200
+    assert score_of(user_id) == 400
+    assert len(bumps) == 1
@@ -0,0 +1,33 @@
+import pytest
+
+DYNAMIC = dict(points=500, scoring='logarithmic', initial_points=500, minimum_points=100, decay=10)
+
+
+def test_duplicate_dynamic_submit_is_not_credited_again(client, make_user, make_challenge, score_of):
+    user_id, headers = make_user()
+    challenge_id, flag = make_challenge(**DYNAMIC)
+
+    first = client.post(f'/api/challenges/{challenge_id}/submit', headers=headers, json={'flag': flag})
+    assert first.status_code == 200
+    score = score_of(user_id)
+    assert score == first.get_json()['points_earned']
+
+    second = client.post(f'/api/challenges/{challenge_id}/submit', headers=headers, json={'flag': flag})
+    assert second.status_code == 400
+    assert score_of(user_id) == score
+
+
+@pytest.mark.parametrize('dialect', ['sqlite', 'postgresql'])
+def test_duplicate_dynamic_solve_returns_none_on_conflict_dialects(app, make_user, make_challenge, score_of, dialect):
+    # Les deux dialectes passent par INSERT ... ON CONFLICT DO NOTHING, que
+    # SQLite sait exécuter : le doublon doit être détecté par le rowcount
+    from datetime import datetime
+    from app.scoring import _record_dynamic_solve
+
+    user_id, _ = make_user()
+    challenge_id, _ = make_challenge(**DYNAMIC)
+    with app.app_context():
+        assert _record_dynamic_solve(dialect, user_id, challenge_id, datetime.utcnow()) is not None
+        score = score_of(user_id)
+        assert _record_dynamic_solve(dialect, user_id, challenge_id, datetime.utcnow()) is None
+    assert score_of(user_id) == score
@@ -0,0 +1,77 @@
+from app.events import EventBroker
+
+
+def queued(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return [(event_type, data) for _, event_type, data in events]
+
+
+def event_id(broker, event):
+    return broker.format(event).split('\n')[0][len('id: '):]
+
+
+def test_reconnect_on_same_worker_replays_missed_events():
+    broker = EventBroker()
+    first = broker.subscribe(16)
+    broker.publish('score', {'score': 1})
+    last_seen = event_id(broker, first.queue.get_nowait())
+    broker.publish('score', {'score': 2})
+
+    assert queued(broker.subscribe(16, last_seen)) == [('score', '{"score":2}')]
+
+
+def test_foreign_or_unknown_event_id_triggers_resync():
+    broker = EventBroker()
+    broker.publish('score', {'score': 1})
+
+    for last_seen in ('0badc0de-1', f'{broker.nonce}-99', 'garbage', '42'):
+        assert queued(broker.subscribe(16, last_seen)) == [('resync', '{}')]
+
+
+def test_gap_larger_than_queue_triggers_resync():
+    broker = EventBroker()
+    subscription = broker.subscribe(16)
+    broker.publish('score', {'score': 0})
+    last_seen = event_id(broker, subscription.queue.get_nowait())
+    for score in range(1, 10):
+        broker.publish('score', {'score': score})
+
+    assert queued(broker.subscribe(4, last_seen)) == [('resync', '{}')]
+
+
+def test_stream_requires_a_ticket_not_the_access_token(client, make_user):
+    _, headers = make_user()
+    token = headers['Authorization'].split()[1]
+
+    assert client.get(f'/api/events/stream?jwt={token}').status_code == 401
+    assert client.get('/api/events/stream?ticket=forged').status_code == 401
+
+    ticket = client.post('/api/events/ticket', headers=headers).get_json()['ticket']
+    response = client.get(f'/api/events/stream?ticket={ticket}', buffered=False)
+    try:
+        assert response.status_code == 200
+        assert next(response.response).startswith(b'retry:')
+    finally:
+        response.close()
+
+
+def test_expired_ticket_is_refused(app, client, make_user):
+    _, headers = make_user()
+    ticket = client.post('/api/events/ticket', headers=headers).get_json()['ticket']
+    app.config['EVENTS_TICKET_MAX_AGE'] = -1
+    try:
+        assert client.get(f'/api/events/stream?ticket={ticket}').status_code == 401
+    finally:
+        app.config['EVENTS_TICKET_MAX_AGE'] = 60
+
+
+def test_disabled_stream_is_refused(app, client, make_user):
+    _, headers = make_user()
+    app.config['EVENTS_STREAM_ENABLED'] = False
+    try:
+        assert client.post('/api/events/ticket', headers=headers).status_code == 503
+        assert client.get('/api/events/stream?ticket=x').status_code == 503
+    finally:
+        app.config['EVENTS_STREAM_ENABLED'] = True
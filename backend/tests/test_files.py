@@ -0,0 +1,51 @@
+import hashlib
+import io
+
+CONTENT = b'0123456789abcdef' * 64
+
+
+def _file_url(client, admin_headers, title):
+    response = client.post('/api/admin/challenges', headers=admin_headers, content_type='multipart/form-data',
+                           data=dict(title=title, description='-', category='Files', difficulty='Easy',
+                                     points='100', flag='FLAG{file}', file=(io.BytesIO(CONTENT), 'data.bin')))
+    assert response.status_code == 201, response.get_json()
+    return f"/api/challenges/{response.get_json()['challenge']['id']}/file"
+
+
+def test_range_requests_and_content_etag(client, admin_headers, make_user):
+    _, headers = make_user()
+    url = _file_url(client, admin_headers, 'file ranges')
+
+    full = client.get(url, headers=headers)
+    assert full.status_code == 200 and full.data == CONTENT
+    assert full.headers['Accept-Ranges'] == 'bytes'
+    etag = full.headers['ETag'].strip('"')
+    assert etag == hashlib.sha256(CONTENT).hexdigest()
+
+    partial = client.get(url, headers=dict(headers, Range='bytes=16-31'))
+    assert partial.status_code == 206 and partial.data == CONTENT[16:32]
+    assert partial.headers['Content-Range'] == f'bytes 16-31/{len(CONTENT)}'
+
+    # Reprise : la plage n'est servie que si le fichier n'a pas changé
+    resumed = client.get(url, headers=dict(headers, Range='bytes=1000-', **{'If-Range': f'"{etag}"'}))
+    assert resumed.status_code == 206 and resumed.data == CONTENT[1000:]
+    changed = client.get(url, headers=dict(headers, Range='bytes=1000-', **{'If-Range': '"other"'}))
+    assert changed.status_code == 200 and changed.data == CONTENT
+
+    cached = client.get(url, headers=dict(headers, **{'If-None-Match': f'"{etag}"'}))
+    assert cached.status_code == 304 and not cached.data
+
+    assert client.get(url, headers=dict(headers, Range=f'bytes={len(CONTENT)}-')).status_code == 416
+
+
+def test_offloaded_download(app, client, admin_headers, make_user, monkeypatch):
+    _, headers = make_user()
+    url = _file_url(client, admin_headers, 'file offload')
+    monkeypatch.setitem(app.config, 'FILE_OFFLOAD', 'x-accel')
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200 and not response.data
+    digest = hashlib.sha256(CONTENT).hexdigest()
+    assert response.headers['X-Accel-Redirect'].startswith('/protected-uploads/')
+    assert response.headers['X-Accel-Redirect'].endswith(digest)
+    assert client.get(url, headers=dict(headers, **{'If-None-Match': f'"{digest}"'})).status_code == 304
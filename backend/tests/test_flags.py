@@ -0,0 +1,48 @@
+import pytest
+
+from app.flags import FlagMatcher, validate_flag
+
+
+def test_exact_flags_one_per_line():
+    matcher = FlagMatcher('FLAG{first}\n  FLAG{second}  \n\n')
+    assert matcher.matches('FLAG{first}') and matcher.matches('FLAG{second}')
+    assert not matcher.matches('FLAG{first}\nFLAG{second}')
+    assert not matcher.matches('flag{first}')
+    assert not matcher.matches(None)
+
+
+def test_case_insensitive_flags():
+    matcher = FlagMatcher('FLAG{Straße}', 'case_insensitive')
+    assert matcher.matches('flag{STRASSE}')
+    assert not matcher.matches('flag{strase}')
+
+
+def test_regex_must_cover_the_whole_flag():
+    matcher = FlagMatcher('FLAG\\{[0-9a-f]{8}\\}\nALT\\{.+\\}', 'regex')
+    assert matcher.matches('FLAG{deadbeef}') and matcher.matches('ALT{anything}')
+    assert not matcher.matches('xFLAG{deadbeef}')
+    assert not matcher.matches('FLAG{deadbeef}x')
+    assert not matcher.matches(42)
+
+
+def test_invalid_flags_are_rejected():
+    assert validate_flag('FLAG{ok}', 'exact') is None
+    assert validate_flag('(', 'regex').startswith('Invalid flag pattern')
+    assert validate_flag('FLAG{ok}', 'glob').startswith('Invalid flag mode')
+    with pytest.raises(ValueError):
+        FlagMatcher('FLAG{ok}', 'glob')
+
+
+def test_submit_uses_the_challenge_matcher(client, admin_headers, make_user, make_challenge):
+    _, headers = make_user()
+    challenge_id, _ = make_challenge(flag='FLAG\\{\\d+\\}', flag_mode='regex')
+
+    def submit(flag):
+        return client.post(f'/api/challenges/{challenge_id}/submit', headers=headers, json={'flag': flag})
+
+    assert submit('FLAG{abc}').status_code == 400
+    # Le cache de matchers est invalidé par la modification
+    response = client.put(f'/api/admin/challenges/{challenge_id}', headers=admin_headers,
+                          data={'flag': 'FLAG{abc}\nFLAG{def}', 'flag_mode': 'exact'})
+    assert response.status_code == 200
+    assert submit('FLAG{def}').status_code == 200
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from app.leaderboard import LeaderboardIndex
+
+
+def test_stale_index_is_rebuilt_once_by_concurrent_readers(app, make_user):
+    make_user()
+    index = LeaderboardIndex()
+    with app.app_context():
+        index.rebuild()
+    rebuilds = []
+    original = index.rebuild
+
+    def slow_rebuild():
+        rebuilds.append(1)
+        time.sleep(0.2)
+        original()
+
+    index.rebuild = slow_rebuild
+    index._built_at = time.monotonic() - 3600
+    barrier = threading.Barrier(8)
+
+    def read():
+        with app.app_context():
+            barrier.wait()
+            # Les lecteurs qui arrivent pendant la reconstruction servent
+            # l'index périmé sans attendre
+            assert index.top(5)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(rebuilds) == 1
+
+
+def _pages(client, headers, limit, cursor=None):
+    entries = []
+    while True:
+        query = f'/api/users/leaderboard?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(query, headers=headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        entries += body['leaderboard']
+        cursor = body['next_cursor']
+        if cursor is None:
+            return entries, body['total']
+
+
+def test_cursor_pages_cover_the_leaderboard_once(client, make_user, make_challenge):
+    user_id, headers = make_user()
+    for _ in range(3):
+        make_user()
+    challenge_id, flag = make_challenge(points=30)
+    client.post(f'/api/challenges/{challenge_id}/submit', headers=headers, json={'flag': flag})
+
+    entries, total = _pages(client, headers, 3)
+    assert len(entries) == total
+    assert [entry['rank'] for entry in entries] == list(range(1, total + 1))
+    by_offset = client.get('/api/users/leaderboard?limit=100&offset=0', headers=headers).get_json()['leaderboard']
+    assert [entry['id'] for entry in entries][:100] == [entry['id'] for entry in by_offset]
+
+    rank = client.get(f'/api/users/{user_id}/rank', headers=headers).get_json()
+    assert entries[rank['rank'] - 1]['id'] == user_id
+    assert rank['score'] == 30 and rank['total'] == total
+
+
+def test_cursor_is_stable_when_a_player_overtakes(client, make_user, make_challenge):
+    _, headers = make_user()
+    mover_id, mover = make_user()
+    first = client.get('/api/users/leaderboard?limit=2', headers=headers).get_json()
+    assert mover_id not in {entry['id'] for entry in first['leaderboard']}
+
+    # Le joueur passe en tête entre deux pages : la page suivante reprend
+    # après la dernière entrée lue, sans doublon
+    challenge_id, flag = make_challenge(points=10 ** 6)
+    client.post(f'/api/challenges/{challenge_id}/submit', headers=mover, json={'flag': flag})
+    second = client.get(f"/api/users/leaderboard?limit=5&cursor={first['next_cursor']}",
+                        headers=headers).get_json()['leaderboard']
+
+    ids = [entry['id'] for entry in second]
+    assert mover_id not in ids
+    assert not set(ids) & {entry['id'] for entry in first['leaderboard']}
+    assert client.get(f'/api/users/{mover_id}/rank', headers=headers).get_json()['rank'] == 1
+
+
+def test_invalid_cursor_and_unknown_user(client, make_user):
+    _, headers = make_user()
+    assert client.get('/api/users/leaderboard?cursor=not-a-cursor', headers=headers).status_code == 400
+    assert client.get('/api/users/999999/rank', headers=headers).status_code == 404
@@ -0,0 +1,100 @@
+import hashlib
+import io
+import json
+import os
+
+import pytest
+
+from app.packs import PackError, export_pack, import_pack
+
+DYNAMIC = dict(points=500, scoring='linear', initial_points=500, minimum_points=100, decay=50)
+
+
+def _entry(title, **fields):
+    entry = dict(title=title, description='-', category='Pack', difficulty='Easy', points=100, flag='FLAG{pack}')
+    entry.update(fields)
+    return entry
+
+
+def _import(app, entries, artifacts_dir=None):
+    pack = ''.join(json.dumps(entry) + '\n' for entry in entries).encode()
+    with app.app_context():
+        return import_pack(io.BytesIO(pack), artifacts_dir)
+
+
+def _blobs(app):
+    root = os.path.join(app.config['UPLOAD_FOLDER'], 'blobs')
+    return {name for _, _, names in os.walk(root) for name in names}
+
+
+def test_export_then_import_round_trip(app, tmp_path):
+    (tmp_path / 'capture.pcap').write_bytes(b'round trip')
+    digest = hashlib.sha256(b'round trip').hexdigest()
+    assert _import(app, [_entry('pack round trip', file='capture.pcap', flag='^FLAG\\{\\d+\\}$',
+                                flag_mode='regex')], str(tmp_path)) == (1, 0)
+
+    export_dir = tmp_path / 'export'
+    export_dir.mkdir()
+    with app.app_context():
+        exported = [json.loads(line) for line in export_pack(str(export_dir))]
+    entry = next(entry for entry in exported if entry['title'] == 'pack round trip')
+    assert entry['artifact'] == digest
+    assert entry['flag_mode'] == 'regex'
+    assert (export_dir / digest).read_bytes() == b'round trip'
+
+    assert _import(app, [dict(entry, points=150)], str(export_dir)) == (0, 1)
+    with app.app_context():
+        again = next(json.loads(line) for line in export_pack() if 'pack round trip' in line)
+    assert again == dict(entry, points=150)
+
+
+def test_invalid_pack_applies_nothing_and_stores_no_file(app, tmp_path):
+    (tmp_path / 'orphan.bin').write_bytes(b'never stored')
+    before = _blobs(app)
+
+    with pytest.raises(PackError):
+        _import(app, [_entry('pack orphan', file='orphan.bin'),
+                      _entry('pack invalid', flag='(', flag_mode='regex')], str(tmp_path))
+
+    assert _blobs(app) == before
+    with app.app_context():
+        assert not any('pack orphan' in line for line in export_pack())
+
+
+def test_failed_transaction_removes_copied_files(app, tmp_path, monkeypatch):
+    from app import packs
+
+    (tmp_path / 'rollback.bin').write_bytes(b'rolled back')
+    before = _blobs(app)
+
+    def fail(challenge_ids):
+        raise RuntimeError('rescoring failed')
+
+    monkeypatch.setattr(packs, 'revalue_challenges', fail)
+    with pytest.raises(RuntimeError):
+        _import(app, [_entry('pack rollback', file='rollback.bin')], str(tmp_path))
+
+    assert _blobs(app) == before
+    with app.app_context():
+        assert not any('pack rollback' in line for line in export_pack())
+
+
+def test_updated_dynamic_challenges_are_rescored_in_the_import(client, app, make_user, make_challenge, score_of):
+    from app.models import db, Challenge
+
+    challenges = [make_challenge(**DYNAMIC) for _ in range(2)]
+    with app.app_context():
+        titles = [db.session.get(Challenge, challenge_id).title for challenge_id, _ in challenges]
+    (both, both_headers), (first, first_headers) = make_user(), make_user()
+    for headers, solved in ((both_headers, challenges), (first_headers, challenges[:1])):
+        for challenge_id, flag in solved:
+            assert client.post(f'/api/challenges/{challenge_id}/submit', headers=headers,
+                               json={'flag': flag}).status_code == 200
+    # Premier challenge : 2 résolutions (450) ; second : 1 résolution (500)
+    assert (score_of(both), score_of(first)) == (950, 450)
+
+    # Décroissance plus forte : 500 - 200 = 300 pour le premier, 500 pour
+    # le second, reportés sur chaque solveur en un seul UPDATE
+    assert _import(app, [_entry(title, flag=flag, **dict(DYNAMIC, decay=200))
+                         for title, (_, flag) in zip(titles, challenges)]) == (0, 2)
+    assert (score_of(both), score_of(first)) == (800, 300)
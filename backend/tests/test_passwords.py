@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from app.passwords import PasswordHasher, HashingBusy
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_timed_out_hashes_are_cancelled_or_keep_their_slot(app):
+    hasher = PasswordHasher()
+    with app.app_context():
+        app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=4, PASSWORD_HASH_TIMEOUT=0.1)
+        try:
+            for _ in range(4):
+                with pytest.raises(HashingBusy):
+                    hasher._run(_sleep, 1)
+            # Les calculs déjà transmis au processus gardent leur place
+            # jusqu'à leur fin ; le dernier, encore en file, a été annulé
+            assert 0 < hasher.pending < 4
+            deadline = time.monotonic() + 10
+            while hasher.pending and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert hasher.pending == 0
+        finally:
+            app.config['PASSWORD_HASH_WORKERS'] = 0
+            hasher._pool.shutdown(cancel_futures=True)
+
+
+def test_full_queue_is_refused_immediately(app):
+    hasher = PasswordHasher()
+    with app.app_context():
+        app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=1, PASSWORD_HASH_TIMEOUT=0.1)
+        try:
+            with pytest.raises(HashingBusy):
+                hasher._run(_sleep, 0.5)
+            started = time.monotonic()
+            with pytest.raises(HashingBusy):
+                hasher._run(_sleep, 0)
+            assert time.monotonic() - started < 0.05
+        finally:
+            app.config['PASSWORD_HASH_WORKERS'] = 0
+            hasher._pool.shutdown(wait=True)
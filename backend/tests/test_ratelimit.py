@@ -0,0 +1,33 @@
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app.ratelimit import DEFAULT_LIMITS, RateLimiter, remote_addr
+
+
+def _limited_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    limiter = RateLimiter()
+    limiter.init_app(app)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+
+    @app.route('/login', methods=['POST'])
+    @limiter.limit('login', ip=remote_addr)
+    def login():
+        return {'ok': True}
+
+    return app
+
+
+def test_ip_limit_is_configurable_and_keyed_on_forwarded_client():
+    app = _limited_app(RATELIMIT_LOGIN_IP='2/60')
+    client = app.test_client()
+
+    def login(ip):
+        return client.post('/login', headers={'X-Forwarded-For': ip}).status_code
+
+    assert [login('203.0.113.1') for _ in range(3)] == [200, 200, 429]
+    # Un autre client derrière le même proxy garde son propre seau
+    assert login('203.0.113.2') == 200
+    assert app.config['RATELIMIT_LIMITS']['login'] == {'user': '5/60', 'ip': '2/60'}
+    assert DEFAULT_LIMITS['login']['ip'] == '100/60'
@@ -0,0 +1,20 @@
+def test_team_scores_stay_frozen(client, admin_headers, make_user, make_challenge):
+    user_id, headers = make_user()
+    challenge_id, flag = make_challenge(points=100)
+    response = client.post('/api/teams', headers=headers, json={'name': f'team {user_id}'})
+    team_id = response.get_json()['id']
+
+    def scores():
+        detail = client.get(f'/api/teams/{team_id}', headers=headers).get_json()['score']
+        listed = [team['score'] for team in client.get(f'/api/teams/?cursor={team_id - 1}&limit=1',
+                                                        headers=headers).get_json()['teams']]
+        return detail, listed
+
+    assert client.post('/api/admin/scoreboard/freeze', headers=admin_headers).status_code == 200
+    try:
+        assert client.post(f'/api/challenges/{challenge_id}/submit', headers=headers,
+                           json={'flag': flag}).status_code == 200
+        assert scores() == (0, [0])
+    finally:
+        assert client.delete('/api/admin/scoreboard/freeze', headers=admin_headers).status_code == 200
+    assert scores() == (100, [100])
@@ -0,0 +1,35 @@
+import atexit
+
+from app.submission_log import SubmissionLog
+
+
+def _log(app, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, 'register', registered.append)
+    monkeypatch.setitem(app.extensions, 'submission_log', app.extensions['submission_log'])
+    log = SubmissionLog()
+    log.init_app(app)
+    log.init_app(app)
+    assert registered == [log.close]
+    return log
+
+
+def _flags(app, challenge_id):
+    from app.models import db, Submission
+
+    with app.app_context():
+        return sorted((row.is_correct, row.flag) for row in
+                      db.session.query(Submission).filter_by(challenge_id=challenge_id))
+
+
+def test_correct_flags_are_not_kept(app, monkeypatch, make_user, make_challenge):
+    log = _log(app, monkeypatch)
+    user_id, _ = make_user()
+    challenge_id, flag = make_challenge()
+
+    log.record(user_id, challenge_id, False, 'FLAG{guess}')
+    log.record(user_id, challenge_id, True, flag)
+    log.close()
+
+    assert log._thread is None and len(log) == 0
+    assert _flags(app, challenge_id) == [(False, 'FLAG{guess}'), (True, None)]
@@ -0,0 +1,30 @@
+import threading
+from collections import Counter
+
+THREADS = 16
+SUBMITS = 5
+
+
+def test_concurrent_submits_credit_once(app, make_user, make_challenge, score_of):
+    user_id, headers = make_user()
+    challenge_id, flag = make_challenge(points=100)
+    statuses = Counter()
+    lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def submit():
+        client = app.test_client()
+        start.wait()
+        for _ in range(SUBMITS):
+            response = client.post(f'/api/challenges/{challenge_id}/submit', headers=headers, json={'flag': flag})
+            with lock:
+                statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=submit) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == {200: 1, 400: THREADS * SUBMITS - 1}
+    assert score_of(user_id) == 100
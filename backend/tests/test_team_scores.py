@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from app.scoring import _is_user_fk_violation
+
+
+def _team(client, owner, member_headers=()):
+    owner_id, owner_headers = owner
+    response = client.post('/api/teams', headers=owner_headers, json={'name': f'team {owner_id}'})
+    team_id = response.get_json()['id']
+    for headers in member_headers:
+        assert client.post(f'/api/teams/{team_id}/join', headers=headers).status_code == 200
+    return team_id
+
+
+def _team_score(app, team_id):
+    from app.models import db, Team
+
+    with app.app_context():
+        return db.session.get(Team, team_id).score
+
+
+def test_teammate_losing_the_team_solve_race_is_still_credited(app, client, make_user, make_challenge, score_of):
+    from app.models import db, TeamSolve
+
+    owner, (member_id, member) = make_user(), make_user()
+    team_id = _team(client, owner, [member])
+    challenge_id, flag = make_challenge(points=100)
+    # Le coéquipier a déjà inséré la ligne team_solves dans une transaction
+    # concurrente, validée entre-temps
+    with app.app_context():
+        db.session.add(TeamSolve(team_id=team_id, challenge_id=challenge_id, solved_at=datetime.utcnow()))
+        db.session.commit()
+
+    response = client.post(f'/api/challenges/{challenge_id}/submit', headers=member, json={'flag': flag})
+    assert response.status_code == 200
+    assert score_of(member_id) == 100
+    assert _team_score(app, team_id) == 0
+
+
+def test_repriced_static_challenge_matches_reconciled_scores(app, client, admin_headers, make_user,
+                                                            make_challenge, score_of):
+    from app.scoring import reconcile_team_scores
+
+    (solver_id, solver), (late_id, late) = make_user(), make_user()
+    team_id = _team(client, (solver_id, solver))
+    challenge_id, flag = make_challenge(points=100)
+    for headers in (solver, late):
+        assert client.post(f'/api/challenges/{challenge_id}/submit', headers=headers,
+                           json={'flag': flag}).status_code == 200
+
+    response = client.put(f'/api/admin/challenges/{challenge_id}', headers=admin_headers, data={'points': '250'})
+    assert response.status_code == 200
+    assert (score_of(solver_id), _team_score(app, team_id)) == (250, 250)
+
+    # Arrivée dans l'équipe après coup : même valeur que le crédit incrémental
+    assert client.post(f'/api/teams/{team_id}/join', headers=late).status_code == 200
+    assert (score_of(late_id), _team_score(app, team_id)) == (250, 250)
+    with app.app_context():
+        reconcile_team_scores()
+    assert _team_score(app, team_id) == 250
+
+
+class _Orig(Exception):
+    def __init__(self, message, pgcode=None):
+        super().__init__(message)
+        self.pgcode = pgcode
+
+
+def test_only_user_foreign_key_violations_mean_unknown_user():
+    def error(message, pgcode=None):
+        return IntegrityError('INSERT', {}, _Orig(message, pgcode))
+
+    assert _is_user_fk_violation(error('violates foreign key constraint "solved_challenges_user_id_fkey"', '23503'))
+    assert not _is_user_fk_violation(error('violates foreign key constraint "solved_challenges_challenge_id_fkey"',
+                                           '23503'))
+    assert not _is_user_fk_violation(error('duplicate key value violates unique constraint', '23505'))
+    assert _is_user_fk_violation(error('FOREIGN KEY constraint failed'))
+    assert not _is_user_fk_violation(error('UNIQUE constraint failed: team_solves.team_id'))
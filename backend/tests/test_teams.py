@@ -0,0 +1,23 @@
+def test_team_list_pages_through_every_team(client, make_user):
+    created = []
+    for _ in range(3):
+        user_id, headers = make_user()
+        created.append(client.post('/api/teams', headers=headers, json={'name': f'listed {user_id}'}).get_json()['id'])
+
+    seen, cursor = [], created[0] - 1
+    while cursor is not None:
+        page = client.get(f'/api/teams/?limit=2&cursor={cursor}&fields=id,name', headers=headers).get_json()
+        assert all(set(team) == {'id', 'name'} for team in page['teams'])
+        seen += [team['id'] for team in page['teams']]
+        cursor = page['next_cursor']
+    assert seen[:3] == created
+
+
+def test_unknown_team_fields_are_rejected(client, make_user):
+    _, headers = make_user()
+
+    response = client.get('/api/teams/?fields=nmae,scroe', headers=headers)
+    assert response.status_code == 400
+    assert 'nmae' in response.get_json()['error']
+    assert client.get('/api/teams/?fields=id,bogus', headers=headers).status_code == 400
+    assert client.get('/api/teams/?fields=id', headers=headers).status_code == 200
@@ -0,0 +1,74 @@
+import { useEffect, useRef } from 'react';
+import axios from 'axios';
+
+const POLL_INTERVAL = 30000;
+const RECONNECT_DELAY = 2000;
+
+// Flux SSE du backend. EventSource ne permet pas d'en-tête Authorization :
+// on demande un ticket de courte durée avec le token d'accès, qui ne passe
+// donc jamais dans une URL. Si le serveur n'ouvre pas de flux (workers
+// sync : 503), `onPoll` est appelé périodiquement à la place.
+const useEventStream = (token, handlers, onPoll) => {
+  const handlersRef = useRef(handlers);
+  const onPollRef = useRef(onPoll);
+  handlersRef.current = handlers;
+  onPollRef.current = onPoll;
+
+  useEffect(() => {
+    if (!token) return undefined;
+
+    let source = null;
+    let timer = null;
+    let poller = null;
+    let closed = false;
+    let lastEventId = null;
+
+    const connect = async () => {
+      let ticket;
+      try {
+        const response = await axios.post(`${process.env.REACT_APP_API_URL}/events/ticket`, null, {
+          headers: {
+            Authorization: `Bearer ${token}`
+          }
+        });
+        ticket = response.data.ticket;
+      } catch (error) {
+        if (!closed && poller === null) {
+          poller = setInterval(() => onPollRef.current && onPollRef.current(), POLL_INTERVAL);
+        }
+        return;
+      }
+      if (closed) return;
+
+      const params = new URLSearchParams({ ticket });
+      if (lastEventId) params.set('last_event_id', lastEventId);
+      source = new EventSource(`${process.env.REACT_APP_API_URL}/events/stream?${params}`);
+
+      Object.keys(handlersRef.current).forEach((name) => {
+        source.addEventListener(name, (event) => {
+          if (event.lastEventId) lastEventId = event.lastEventId;
+          const handler = handlersRef.current[name];
+          if (handler) handler(event);
+        });
+      });
+
+      // Fin du flux (EVENTS_MAX_DURATION) ou coupure : le navigateur
+      // réutiliserait le même ticket, expiré entre-temps
+      source.onerror = () => {
+        source.close();
+        if (!closed) timer = setTimeout(connect, RECONNECT_DELAY);
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      if (source) source.close();
+      clearTimeout(timer);
+      clearInterval(poller);
+    };
+  }, [token]);
+};
+
+export default useEventStream;
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
 import { useAuth } from '../contexts/AuthContext';
+import useEventStream from '../hooks/useEventStream';
 
 const Challenges = () => {
   const [challenges, setChallenges] = useState([]);
@@ -25,9 +26,33 @@ const Challenges = () => {
     }
   }, [token]);
 
-  const fetchChallenges = async () => {
+  // Flux SSE : activation/désactivation des challenges et flags validés
+  useEventStream(token, {
+    challenge: () => {
+      fetchChallenges(false);
+      fetchCategories();
+      fetchDifficulties();
+    },
+    solve: (event) => {
+      const delta = JSON.parse(event.data);
+      if (!user || delta.user_id !== user.id) return;
+      setChallenges((current) => current.map((challenge) => (
+        challenge.id === delta.challenge_id ? { ...challenge, is_solved: true } : challenge
+      )));
+    },
+    // Score dynamique : nouvelle valeur d'un challenge
+    rescore: (event) => {
+      const { challenge_id: challengeId, points } = JSON.parse(event.data);
+      setChallenges((current) => current.map((challenge) => (
+        challenge.id === challengeId ? { ...challenge, points } : challenge
+      )));
+    },
+    resync: () => fetchChallenges(false)
+  }, () => fetchChallenges(false));
+
+  const fetchChallenges = async (showLoading = true) => {
     try {
-      setLoading(true);
+      if (showLoading) setLoading(true);
       const response = await axios.get(`${process.env.REACT_APP_API_URL}/challenges/`, {
         headers: {
           Authorization: `Bearer ${token}`
@@ -1,27 +1,63 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import axios from 'axios';
+import { useAuth } from '../contexts/AuthContext';
+import useEventStream from '../hooks/useEventStream';
 
 const Leaderboard = () => {
   const [leaderboard, setLeaderboard] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [frozenAt, setFrozenAt] = useState(null);
 
-  useEffect(() => {
-    fetchLeaderboard();
-  }, []);
+  const { token } = useAuth();
 
-  const fetchLeaderboard = async () => {
+  const fetchLeaderboard = useCallback(async (showLoading = true) => {
     try {
-      setLoading(true);
+      if (showLoading) setLoading(true);
       const response = await axios.get(`${process.env.REACT_APP_API_URL}/users/leaderboard`);
       setLeaderboard(response.data.leaderboard);
+      setFrozenAt(response.data.frozen_at);
     } catch (error) {
       setError('Erreur lors du chargement du classement');
       console.error('Error fetching leaderboard:', error);
     } finally {
       setLoading(false);
     }
-  };
+  }, []);
+
+  useEffect(() => {
+    fetchLeaderboard();
+  }, [fetchLeaderboard]);
+
+  // Mises à jour en direct via le flux SSE au lieu de recharger la page
+  useEventStream(token, {
+    score: (event) => {
+      const delta = JSON.parse(event.data);
+      setLeaderboard((current) => {
+        const index = current.findIndex((entry) => entry.id === delta.user_id);
+        if (index === -1) {
+          // Nouvel entrant potentiel : on recharge le haut du classement
+          if (current.length === 0 || delta.rank <= current.length) {
+            fetchLeaderboard(false);
+          }
+          return current;
+        }
+        const updated = [...current];
+        updated[index] = {
+          ...updated[index],
+          score: delta.score,
+          solved_challenges: delta.solved_challenges,
+          rank: delta.rank
+        };
+        return updated.sort((a, b) => b.score - a.score);
+      });
+    },
+    // Score dynamique : tous les solveurs d'un challenge ont changé de score
+    rescore: () => fetchLeaderboard(false),
+    resync: () => fetchLeaderboard(false),
+    // Gel ou dégel du classement par un administrateur
+    scoreboard: () => fetchLeaderboard(false)
+  }, () => fetchLeaderboard(false));
 
   if (loading) {
     return (
@@ -43,6 +79,12 @@ const Leaderboard = () => {
     <div className="max-w-4xl mx-auto">
       <h1 className="text-2xl font-bold text-cyan-400 mb-8">Classement</h1>
 
+      {frozenAt && (
+        <div className="bg-[#00bcd4]/10 border border-[#00bcd4]/30 text-cyan-400 px-4 py-3 rounded mb-4">
+          Classement gelé depuis le {new Date(`${frozenAt}Z`).toLocaleString('fr-FR')}
+        </div>
+      )}
+
       <div className="card">
         <div className="overflow-x-auto">
           <table className="min-w-full divide-y divide-[#00bcd4]/30">
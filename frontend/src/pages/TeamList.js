@@ -7,6 +7,8 @@ const TeamList = () => {
   const [teams, setTeams] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const { token, user } = useAuth();
 
   useEffect(() => {
@@ -18,21 +20,30 @@ const TeamList = () => {
     }
   }, [token]);
 
-  const fetchTeams = async () => {
+  // Pages de 100 équipes, enchaînées par curseur (next_cursor)
+  const fetchTeams = async (cursor = null) => {
     try {
-      setLoading(true);
+      if (cursor === null) setLoading(true);
+      else setLoadingMore(true);
       const response = await axios.get(`${process.env.REACT_APP_API_URL}/teams/`, {
+        params: {
+          fields: 'id,name,score,member_count',
+          limit: 100,
+          ...(cursor !== null && { cursor })
+        },
         headers: {
           Authorization: `Bearer ${token}`
         }
       });
-      setTeams(response.data.teams);
+      setTeams((current) => (cursor === null ? response.data.teams : [...current, ...response.data.teams]));
+      setNextCursor(response.data.next_cursor);
       setError(null);
     } catch (error) {
       console.error('Error fetching teams:', error);
       setError(error.response?.data?.error || 'Failed to load teams.');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -72,13 +83,21 @@ const TeamList = () => {
                   <Link to={`/teams/${team.id}`} className="block">
                     <h2 className="text-xl font-semibold text-green-400">{team.name}</h2>
                     <p className="text-gray-400">Score: {team.score}</p>
-                    <p className="text-gray-400">Members: {team.members.length}/5</p>
+                    <p className="text-gray-400">Members: {team.member_count}/5</p>
                   </Link>
                 </li>
               ))}
             </ul>
           )}
 
+          {nextCursor !== null && (
+            <div className="mt-6 text-center">
+              <button onClick={() => fetchTeams(nextCursor)} className="btn-secondary" disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more teams'}
+              </button>
+            </div>
+          )}
+
           {/* Optional: Link to create team if user is not in a team */}
           {user && !user.teams.length && (
               <div className="mt-6 text-center">
@@ -6,11 +6,43 @@ const Dashboard = () => {
   const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [frozenAt, setFrozenAt] = useState(null);
 
   useEffect(() => {
     fetchStats();
+    fetchFreeze();
   }, []);
 
+  const authHeaders = () => ({
+    Authorization: `Bearer ${localStorage.getItem('token')}`
+  });
+
+  const fetchFreeze = async () => {
+    try {
+      const response = await axios.get(`${process.env.REACT_APP_API_URL}/admin/scoreboard/freeze`, {
+        headers: authHeaders()
+      });
+      setFrozenAt(response.data.frozen_at);
+    } catch (error) {
+      console.error('Error fetching scoreboard freeze:', error);
+    }
+  };
+
+  const toggleFreeze = async () => {
+    try {
+      const url = `${process.env.REACT_APP_API_URL}/admin/scoreboard/freeze`;
+      if (frozenAt) {
+        await axios.delete(url, { headers: authHeaders() });
+        setFrozenAt(null);
+      } else {
+        const response = await axios.post(url, null, { headers: authHeaders() });
+        setFrozenAt(response.data.frozen_at);
+      }
+    } catch (error) {
+      console.error('Error toggling scoreboard freeze:', error);
+    }
+  };
+
   const fetchStats = async () => {
     try {
       setLoading(true);
@@ -55,6 +87,9 @@ const Dashboard = () => {
           <Link to="/admin/users" className="btn-secondary">
             Gérer les utilisateurs
           </Link>
+          <button onClick={toggleFreeze} className="btn-secondary">
+            {frozenAt ? 'Dégeler le classement' : 'Geler le classement'}
+          </button>
         </div>
       </div>
 
@@ -109,6 +144,50 @@ const Dashboard = () => {
           </div>
         </div>
       )}
+
+      {stats && stats.challenges && (
+        <div className="grid grid-cols-1 md:grid-cols-3 gap-8 mt-8">
+          <div className="card md:col-span-2">
+            <h2 className="text-xl font-semibold text-cyan-400 mb-6">
+              Résolutions par challenge ({stats.total_solves})
+            </h2>
+            <table className="min-w-full">
+              <thead>
+                <tr className="text-left text-cyan-400">
+                  <th className="pb-2">Challenge</th>
+                  <th className="pb-2">Résolutions</th>
+                  <th className="pb-2">First blood</th>
+                </tr>
+              </thead>
+              <tbody>
+                {stats.challenges.map((challenge) => (
+                  <tr key={challenge.id} className="text-white">
+                    <td className="py-1">{challenge.title}</td>
+                    <td className="py-1 text-[#00ff9d] font-medium">{challenge.solves}</td>
+                    <td className="py-1">
+                      {challenge.first_blood
+                        ? `${challenge.first_blood.username} (${new Date(challenge.first_blood.solved_at).toLocaleString()})`
+                        : '-'}
+                    </td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          </div>
+
+          <div className="card">
+            <h2 className="text-xl font-semibold text-cyan-400 mb-6">Résolutions par heure</h2>
+            <div className="space-y-2">
+              {stats.solves_per_hour.map(({ hour, solves }) => (
+                <div key={hour} className="flex items-center justify-between">
+                  <span className="text-white">{new Date(`${hour}Z`).toLocaleString()}</span>
+                  <span className="text-[#00ff9d] font-medium">{solves}</span>
+                </div>
+              ))}
+            </div>
+          </div>
+        </div>
+      )}
     </div>
   );
 };